@@ -1,5 +1,10 @@
-from flask import Flask, send_from_directory
+import requests
+from flask import Flask, jsonify, send_from_directory
 from flask_cors import CORS
+
+from app.utils import compression, metrics, prefetch, request_log
+from app.utils.json_provider import json_provider_class
+from app.utils.resilience import UpstreamError, UpstreamUnavailable
 from config import Config
 
 
@@ -10,8 +15,13 @@ def create_app():
     CORS(app)
 
     app.config.from_object(Config)
+    app.json = json_provider_class()(app)
+    request_log.init_app(app)
+    metrics.init_app(app)
+    prefetch.init_app(app)
+    compression.init_app(app)
 
-    from app.routes import status, login, profile, logout, attendance, timetable, present, absent, results, end_semester_results, academic_analysis
+    from app.routes import status, login, profile, logout, attendance, timetable, present, absent, results, end_semester_results, academic_analysis, dashboard
 
     app.register_blueprint(status.bp)
     app.register_blueprint(login.bp)
@@ -24,6 +34,29 @@ def create_app():
     app.register_blueprint(results.bp)
     app.register_blueprint(end_semester_results.bp)
     app.register_blueprint(academic_analysis.bp)
+    app.register_blueprint(dashboard.bp)
+
+    @app.errorhandler(UpstreamUnavailable)
+    def upstream_unavailable(e):
+        response = jsonify({"message": f"{e.reason}. Please try again later."})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response
+
+    @app.errorhandler(UpstreamError)
+    def upstream_error(e):
+        response = jsonify({"message": f"{e.reason}. Please try again later."})
+        response.status_code = 502
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response
+
+    @app.errorhandler(requests.exceptions.Timeout)
+    def upstream_timeout(e):
+        return jsonify({"message": "ETLab took too long to respond"}), 504
+
+    @app.errorhandler(requests.exceptions.ConnectionError)
+    def upstream_connection_error(e):
+        return jsonify({"message": "Could not connect to ETLab"}), 502
 
     # Add route for web interface
     @app.route('/')
@@ -1,203 +1,271 @@
-import requests
-from bs4 import BeautifulSoup
-from flask import Blueprint, jsonify, request
+import logging
 import re
 
-from app.utils.token_required import require_token_auth
+import requests
+from bs4 import Tag
+from flask import Blueprint, jsonify
+
+from app.utils import upstream
+from app.utils.conditional import conditional, partial_response
+from app.utils.html_parser import parse_html
+from app.utils.resilience import UpstreamUnavailable
+from app.utils.singleflight import coalesced
+from app.utils.timing import timed
+from app.utils.token_required import get_token, require_token_auth
 from config import Config
 
 bp = Blueprint("academic_analysis", __name__, url_prefix="/api")
+logger = logging.getLogger(__name__)
+
+
+# Semester names, in order of semester number
+SEMESTER_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r'(1st\s+Semester)',
+        r'(2nd\s+Semester|IInd\s+Semester)',
+        r'(3rd\s+Semester|IIIrd\s+Semester)',
+        r'(4th\s+Semester|IVth\s+Semester)',
+        r'(5th\s+Semester|Vth\s+Semester)',
+        r'(6th\s+Semester|VIth\s+Semester)',
+        r'(7th\s+Semester|VIIth\s+Semester)',
+        r'(8th\s+Semester|VIIIth\s+Semester)',
+    )
+]
+# Every semester pattern contains this, so text without it skips all eight
+SEMESTER_HINT = re.compile(r'\s+Semester', re.IGNORECASE)
+
+# Attendance cell in the table layout, e.g. "435/450 (97%)"
+ATTENDANCE_CELL = re.compile(r'(\d+)/(\d+)\s*\((\d+)%\)')
+
+# "Label: value" pairs in the card layout
+ATTENDANCE_LABEL = re.compile(r'Attendance:\s*(\d+)/(\d+)\s*\((\d+)%\)', re.IGNORECASE)
+SGPA_LABEL = re.compile(r'SGPA:\s*([0-9.]+)', re.IGNORECASE)
+CGPA_LABEL = re.compile(r'CGPA:\s*([0-9.]+)', re.IGNORECASE)
+EARNED_CREDIT_LABEL = re.compile(r'Earned Credit:\s*(\d+)', re.IGNORECASE)
+CUMULATIVE_CREDIT_LABEL = re.compile(r'Cumulative Credit:\s*(\d+)', re.IGNORECASE)
+RESULT_LABEL = re.compile(r'Result:\s*(\w+)', re.IGNORECASE)
+
+# Page wide figures
+OVERALL_CGPA = re.compile(r'CGPA:\s*([0-9.]+)')
+OVERALL_CREDIT = re.compile(r'Cumulative Credit:\s*(\d+)')
+TOTAL_BACKLOGS = re.compile(r'Total Backlogs[:\s]*(\d+)', re.IGNORECASE)
+CURRENT_BACKLOGS = re.compile(r'Current Backlogs[:\s]*(\d+)', re.IGNORECASE)
+
+# Upper bound on semesters taken from the card layout
+MAX_CARD_SEMESTERS = 16
+
+
+def match_semester(text):
+    """Return (semester number, match) for the first semester name in text, or (0, None)."""
+    if SEMESTER_HINT.search(text):
+        for number, pattern in enumerate(SEMESTER_PATTERNS, 1):
+            match = pattern.search(text)
+            if match:
+                return number, match
+    return 0, None
+
+
+def _number(text, cast):
+    try:
+        return cast(text) if text else cast(0)
+    except ValueError:
+        return cast(0)
+
+
+def _attendance(match):
+    if not match:
+        return {'present': 0, 'total': 0, 'percentage': 0}
+    return {
+        'present': int(match.group(1)),
+        'total': int(match.group(2)),
+        'percentage': int(match.group(3)),
+    }
+
+
+def parse_semester_row(cells):
+    """Parse one table row: semester, attendance, sgpa, credits, cgpa, result."""
+    texts = [cell.get_text(strip=True) for cell in cells[:7]]
+    number, _ = match_semester(texts[0])
+    if not number:
+        return None
+
+    return {
+        'semester_name': texts[0],
+        'semester_number': number,
+        'attendance': _attendance(ATTENDANCE_CELL.search(texts[1])),
+        'sgpa': _number(texts[2], float),
+        'earned_credit': _number(texts[3], int),
+        'cumulative_credit': _number(texts[4], int),
+        'cgpa': _number(texts[5], float),
+        'result': texts[6] if len(texts) > 6 and texts[6] else 'N/A',
+    }
+
+
+def parse_semester_card(text):
+    """Parse the "Label: value" text of one semester card, or None if it has no figures."""
+    number, match = match_semester(text)
+    if not number:
+        return None
+
+    semester_data = {
+        'semester_name': match.group(1),
+        'semester_number': number
+    }
+
+    attendance_match = ATTENDANCE_LABEL.search(text)
+    if attendance_match:
+        semester_data['attendance'] = _attendance(attendance_match)
+
+    sgpa_match = SGPA_LABEL.search(text)
+    if sgpa_match:
+        semester_data['sgpa'] = float(sgpa_match.group(1))
+
+    cgpa_match = CGPA_LABEL.search(text)
+    if cgpa_match:
+        semester_data['cgpa'] = float(cgpa_match.group(1))
+
+    earned_credit_match = EARNED_CREDIT_LABEL.search(text)
+    if earned_credit_match:
+        semester_data['earned_credit'] = int(earned_credit_match.group(1))
+
+    cumulative_credit_match = CUMULATIVE_CREDIT_LABEL.search(text)
+    if cumulative_credit_match:
+        semester_data['cumulative_credit'] = int(cumulative_credit_match.group(1))
+
+    result_match = RESULT_LABEL.search(text)
+    if result_match:
+        semester_data['result'] = result_match.group(1)
+
+    # Only a name and number means this is a heading, not a card
+    if len(semester_data) <= 2:
+        return None
+    return semester_data
+
+
+def _div_strings(soup):
+    """
+    Walk the page once, collecting its stripped strings and the slice of
+    them each div covers, so a div's text (what get_text(strip=True) would
+    give) is a join rather than another walk of its subtree.
+    """
+    strings = []
+    spans = []  # [div, start, end] in document order
+    open_tags = []  # (tag, span) for the tags enclosing the current element
+    types = None
+
+    for element in soup.descendants:
+        while open_tags and open_tags[-1][0] is not element.parent:
+            _, span = open_tags.pop()
+            if span:
+                span[2] = len(strings)
+
+        if isinstance(element, Tag):
+            span = None
+            if element.name == 'div':
+                if types is None:
+                    types = element.interesting_string_types
+                    if isinstance(types, type):
+                        types = (types,)
+                span = [element, len(strings), None]
+                spans.append(span)
+            open_tags.append((element, span))
+        elif types is not None and type(element) in types:
+            text = element.strip()
+            if text:
+                strings.append(text)
+
+    for _, span in open_tags:
+        if span:
+            span[2] = len(strings)
+    return strings, spans
+
+
+def parse_semester_cards(soup):
+    """
+    Find semester cards in a div based layout. A card is the innermost div
+    whose text has a semester name and at least one figure; the divs around
+    it are skipped, as are its own headings.
+    """
+    strings, spans = _div_strings(soup)
+    semesters = []
+    # Ids of tags that enclose a card already found
+    enclosing = set()
+
+    # Reverse document order visits every div after all of its descendants
+    for div, start, end in reversed(spans):
+        if id(div) in enclosing:
+            continue
+        semester_data = parse_semester_card(''.join(strings[start:end]))
+        if not semester_data:
+            continue
+
+        semesters.append(semester_data)
+        if len(semesters) >= MAX_CARD_SEMESTERS:
+            break
+        parent = div.parent
+        while parent is not None and id(parent) not in enclosing:
+            enclosing.add(id(parent))
+            parent = parent.parent
 
+    semesters.reverse()
+    return semesters
 
+
+@timed("parse")
 def parse_semester_data(soup):
     """
     Parse academic analysis data from the HTML page
     Based on the actual structure from the academic analysis page
     """
-    semesters = []
-    
     try:
-        # Method 1: Look for semester data in the exact structure from the screenshot
-        # The data appears to be in a specific layout with semester names followed by metrics
-        
-        # Find all text that contains semester information
-        all_text = soup.get_text()
-        
-        # Look for patterns like "1st Semester", "IInd Semester", etc.
-        semester_patterns = [
-            r'(1st\s+Semester)',
-            r'(2nd\s+Semester|IInd\s+Semester)', 
-            r'(3rd\s+Semester|IIIrd\s+Semester)',
-            r'(4th\s+Semester|IVth\s+Semester)',
-            r'(5th\s+Semester|Vth\s+Semester)',
-            r'(6th\s+Semester|VIth\s+Semester)',
-            r'(7th\s+Semester|VIIth\s+Semester)',
-            r'(8th\s+Semester|VIIIth\s+Semester)'
-        ]
-        
-        # Method 2: Look for table-based structure
-        tables = soup.find_all('table')
-        for table in tables:
-            rows = table.find_all('tr')
-            for row in rows:
-                cells = row.find_all('td')
-                if len(cells) >= 6:  # Should have semester, attendance, sgpa, credits, cgpa, result
-                    first_cell_text = cells[0].get_text(strip=True)
-                    
-                    # Check if this row contains semester information
-                    semester_match = None
-                    semester_number = 0
-                    
-                    for i, pattern in enumerate(semester_patterns, 1):
-                        if re.search(pattern, first_cell_text, re.IGNORECASE):
-                            semester_match = first_cell_text
-                            semester_number = i
-                            break
-                    
-                    if semester_match:
-                        semester_data = {
-                            'semester_name': semester_match,
-                            'semester_number': semester_number
-                        }
-                        
-                        # Parse attendance (format: "435/450 (97%)")
-                        if len(cells) > 1:
-                            attendance_text = cells[1].get_text(strip=True)
-                            attendance_match = re.search(r'(\d+)/(\d+)\s*\((\d+)%\)', attendance_text)
-                            if attendance_match:
-                                semester_data['attendance'] = {
-                                    'present': int(attendance_match.group(1)),
-                                    'total': int(attendance_match.group(2)),
-                                    'percentage': int(attendance_match.group(3))
-                                }
-                            else:
-                                semester_data['attendance'] = {'present': 0, 'total': 0, 'percentage': 0}
-                        
-                        # Parse SGPA
-                        if len(cells) > 2:
-                            sgpa_text = cells[2].get_text(strip=True)
-                            try:
-                                semester_data['sgpa'] = float(sgpa_text) if sgpa_text else 0.0
-                            except ValueError:
-                                semester_data['sgpa'] = 0.0
-                        
-                        # Parse Earned Credit
-                        if len(cells) > 3:
-                            earned_credit_text = cells[3].get_text(strip=True)
-                            try:
-                                semester_data['earned_credit'] = int(earned_credit_text) if earned_credit_text else 0
-                            except ValueError:
-                                semester_data['earned_credit'] = 0
-                        
-                        # Parse Cumulative Credit
-                        if len(cells) > 4:
-                            cumulative_credit_text = cells[4].get_text(strip=True)
-                            try:
-                                semester_data['cumulative_credit'] = int(cumulative_credit_text) if cumulative_credit_text else 0
-                            except ValueError:
-                                semester_data['cumulative_credit'] = 0
-                        
-                        # Parse CGPA
-                        if len(cells) > 5:
-                            cgpa_text = cells[5].get_text(strip=True)
-                            try:
-                                semester_data['cgpa'] = float(cgpa_text) if cgpa_text else 0.0
-                            except ValueError:
-                                semester_data['cgpa'] = 0.0
-                        
-                        # Parse Result
-                        if len(cells) > 6:
-                            result_text = cells[6].get_text(strip=True)
-                            semester_data['result'] = result_text if result_text else 'N/A'
-                        else:
-                            semester_data['result'] = 'N/A'
-                        
-                        semesters.append(semester_data)
-        
-        # Method 3: Alternative parsing for different page structures
+        # The usual layout is a table with one row per semester
+        semesters = []
+        for row in soup.find_all('tr'):
+            if row.find_parent('table') is None:
+                continue
+            cells = row.find_all('td')
+            if len(cells) >= 6:  # Should have semester, attendance, sgpa, credits, cgpa, result
+                semester_data = parse_semester_row(cells)
+                if semester_data:
+                    semesters.append(semester_data)
+
+        # Some pages show each semester as a card of "Label: value" text instead
         if not semesters:
-            # Try to find semester data in div elements or other structures
-            semester_divs = soup.find_all('div')
-            for div in semester_divs:
-                div_text = div.get_text(strip=True)
-                
-                # Look for semester pattern in div text
-                for i, pattern in enumerate(semester_patterns, 1):
-                    if re.search(pattern, div_text, re.IGNORECASE):
-                        # Found a semester, now try to extract data from surrounding elements
-                        semester_data = {
-                            'semester_name': re.search(pattern, div_text, re.IGNORECASE).group(1),
-                            'semester_number': i
-                        }
-                        
-                        # Look for attendance, SGPA, CGPA patterns in the same div or nearby divs
-                        attendance_match = re.search(r'Attendance:\s*(\d+)/(\d+)\s*\((\d+)%\)', div_text, re.IGNORECASE)
-                        if attendance_match:
-                            semester_data['attendance'] = {
-                                'present': int(attendance_match.group(1)),
-                                'total': int(attendance_match.group(2)),
-                                'percentage': int(attendance_match.group(3))
-                            }
-                        
-                        sgpa_match = re.search(r'SGPA:\s*([0-9.]+)', div_text, re.IGNORECASE)
-                        if sgpa_match:
-                            semester_data['sgpa'] = float(sgpa_match.group(1))
-                        
-                        cgpa_match = re.search(r'CGPA:\s*([0-9.]+)', div_text, re.IGNORECASE)
-                        if cgpa_match:
-                            semester_data['cgpa'] = float(cgpa_match.group(1))
-                        
-                        earned_credit_match = re.search(r'Earned Credit:\s*(\d+)', div_text, re.IGNORECASE)
-                        if earned_credit_match:
-                            semester_data['earned_credit'] = int(earned_credit_match.group(1))
-                        
-                        cumulative_credit_match = re.search(r'Cumulative Credit:\s*(\d+)', div_text, re.IGNORECASE)
-                        if cumulative_credit_match:
-                            semester_data['cumulative_credit'] = int(cumulative_credit_match.group(1))
-                        
-                        result_match = re.search(r'Result:\s*(\w+)', div_text, re.IGNORECASE)
-                        if result_match:
-                            semester_data['result'] = result_match.group(1)
-                        
-                        # Only add if we found some meaningful data
-                        if len(semester_data) > 2:  # More than just name and number
-                            semesters.append(semester_data)
-                        break
-        
+            semesters = parse_semester_cards(soup)
+
+        page_text = soup.get_text()
+
         # Extract overall statistics if available
         overall_stats = {}
-        page_text = soup.get_text()
-        
-        # Look for overall CGPA
-        overall_cgpa_match = re.search(r'CGPA:\s*([0-9.]+)', page_text)
+
+        overall_cgpa_match = OVERALL_CGPA.search(page_text)
         if overall_cgpa_match:
             overall_stats['overall_cgpa'] = float(overall_cgpa_match.group(1))
-        
-        # Look for overall cumulative credit
-        overall_credit_match = re.search(r'Cumulative Credit:\s*(\d+)', page_text)
+
+        overall_credit_match = OVERALL_CREDIT.search(page_text)
         if overall_credit_match:
             overall_stats['overall_cumulative_credit'] = int(overall_credit_match.group(1))
-        
+
         # Extract backlogs information if available
         backlogs_info = {}
-        
-        # Look for backlogs data
-        total_backlogs_match = re.search(r'Total Backlogs[:\s]*(\d+)', page_text, re.IGNORECASE)
+
+        total_backlogs_match = TOTAL_BACKLOGS.search(page_text)
         if total_backlogs_match:
             backlogs_info['total_backlogs'] = int(total_backlogs_match.group(1))
-        
-        current_backlogs_match = re.search(r'Current Backlogs[:\s]*(\d+)', page_text, re.IGNORECASE)
+
+        current_backlogs_match = CURRENT_BACKLOGS.search(page_text)
         if current_backlogs_match:
             backlogs_info['current_backlogs'] = int(current_backlogs_match.group(1))
-        
+
         return {
             'semesters': semesters,
             'overall_stats': overall_stats,
             'backlogs_info': backlogs_info
         }
-        
+
     except Exception as e:
-        print(f"Error parsing semester data: {e}")
+        logger.exception("Error parsing semester data")
         return {
             'semesters': [],
             'overall_stats': {},
@@ -208,29 +276,34 @@ def parse_semester_data(soup):
 
 @bp.route("/academic-analysis", methods=["GET"])
 @require_token_auth
+@conditional(max_age=Config.RESPONSE_MAX_AGES["academic_analysis"])
 def academic_analysis():
     """
     Get comprehensive academic analysis data including semester-wise SGPA, CGPA, 
     attendance, credits, and backlogs information
     """
-    auth_header = request.headers.get("Authorization", "")
-    token = auth_header.split(" ")[1] if auth_header.startswith("Bearer ") else auth_header
-    
-    headers = {"User-Agent": Config.USER_AGENT}
-    cookie = {Config.COOKIE_KEY: token}
-    
+    body, status = load_academic_analysis(get_token())
+    if status == 200 and "error" in body["academic_analysis"]:
+        # The page could not be parsed
+        partial_response()
+    return jsonify(body), status
+
+
+@coalesced
+def load_academic_analysis(token):
+    """Fetch and parse the academic analysis page. Returns (body, status)."""
     # URL for academic analysis page
     analysis_url = f"{Config.BASE_URL}/ktuacademics/student/studentacademicsautonomous"
     
     try:
-        response = requests.get(analysis_url, headers=headers, cookies=cookie)
+        response = upstream.get(analysis_url, token=token)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, "html.parser")
-        
         # Check if redirected to login
-        if soup.find("title") and "login" in soup.find("title").text.lower():
-            return jsonify({"message": "Token expired. Please login again."}), 401
+        if upstream.is_login_page(response):
+            return {"message": "Token expired. Please login again."}, 401
+        
+        soup = parse_html(response.text)
         
         # Parse the academic analysis data
         analysis_data = parse_semester_data(soup)
@@ -243,9 +316,11 @@ def academic_analysis():
             "timestamp": "Generated from ETLab Academic Analysis"
         }
         
-        return jsonify(response_body), 200
+        return response_body, 200
         
+    except UpstreamUnavailable:
+        raise
     except requests.exceptions.RequestException as e:
-        return jsonify({"message": f"Failed to fetch academic analysis: {str(e)}"}), 500
+        return {"message": f"Failed to fetch academic analysis: {str(e)}"}, 500
     except Exception as e:
-        return jsonify({"message": f"Error processing academic analysis: {str(e)}"}), 500
\ No newline at end of file
+        return {"message": f"Error processing academic analysis: {str(e)}"}, 500
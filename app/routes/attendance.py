@@ -1,14 +1,29 @@
 import re
 
 import requests
-from bs4 import BeautifulSoup
 from flask import Blueprint, jsonify, request
 
-from app.utils.token_required import require_token_auth
+from app.utils import upstream
+from app.utils.attendance_calendar import (
+    CalendarError,
+    fetch_calendar,
+    merge_calendars,
+    parse_calendar_args,
+    parse_range_args,
+)
+from app.utils.concurrency import bounded_map
+from app.utils.html_parser import parse_html
+from app.utils.resilience import UpstreamError, UpstreamUnavailable
+from app.utils.tables import cell_texts
+from app.utils.timing import timed
+from app.utils.token_required import get_token, require_token_auth
 from config import Config
 
 bp = Blueprint("attendance", __name__, url_prefix="/api")
 
+# "(97%)" in a "present/total (percentage)" cell
+PERCENTAGE = re.compile(r"\((.*?)\)")
+
 
 @bp.route("/attendance", methods=["GET"])
 @require_token_auth
@@ -18,67 +33,141 @@ def attendance():
     # is always for the current active semester
     semester = request.args.get("semester")
     
-    # Extract token from Authorization header (format: "Bearer <token>")
-    auth_header = request.headers.get("Authorization", "")
-    if auth_header.startswith("Bearer "):
-        token = auth_header.split(" ")[1]
-    else:
-        token = auth_header
-
-    # Extract token from Authorization header (format: "Bearer <token>")
-    auth_header = request.headers.get("Authorization", "")
-    if auth_header.startswith("Bearer "):
-        token = auth_header.split(" ")[1]
-    else:
-        token = auth_header
-
-    headers = {
-        "User-Agent": Config.USER_AGENT,
-    }
-    cookie = {Config.COOKIE_KEY: token}
+    token = get_token()
+
+    response = upstream.get(attendance_path(semester), token=token)
+    if upstream.is_login_page(response):
+        return jsonify({"message": "Token expired. Please login again."}), 401
+
+    response_body = parse_attendance(parse_html(response.text, "attendance"))
+    response_body["note"] = "ETLab attendance displays current semester subjects only, not filtered by requested semester"
+
+    return jsonify(response_body), 200
+
+
+def attendance_path(semester=None):
     # Note: ETLab attendance endpoint shows current semester only regardless of parameter
     # Using current semester (defaulting to 5 if no semester specified)
     current_semester = semester if semester else 5
-    response = requests.get(
-        f"{Config.BASE_URL}/ktuacademics/student/viewattendancesubject/{current_semester}",
-        headers=headers,
-        cookies=cookie,
-    )
-    soup = BeautifulSoup(response.text, "html.parser")
-    title = soup.find("title")
-    if title and "login" in title.text.lower():
-        return jsonify({"message": "Token expired. Please login again."}), 401
+    return f"/ktuacademics/student/viewattendancesubject/{current_semester}"
 
+
+@timed("parse")
+def parse_attendance(soup):
+    """Parse the subject-wise attendance table.
+
+    The table has one header row and one data row: registration number,
+    roll number and name, a "present/total (percentage)" cell per subject,
+    then the overall total and percentage.
+    """
     response_body = {}
     table = soup.find("table", class_="items")
-    table_headers = table.find_all("th")
-    table_data = table.find_all("td")
+    table_headers = cell_texts(table.find_all("th"))
+    table_data = cell_texts(table.find_all("td"), strip=False)
 
-    response_body["university_reg_no"] = table_data[0].text
-    response_body["roll_no"] = table_data[1].text
-    response_body["name"] = table_data[2].text
+    response_body["university_reg_no"] = table_data[0]
+    response_body["roll_no"] = table_data[1]
+    response_body["name"] = table_data[2]
 
-    for i in range(3, len(table_data) - 2):
-        subject_code = table_headers[i].text.strip()
-        attendance_str = table_data[i].text.strip()
+    for subject_code, attendance_str in zip(table_headers[3:], table_data[3:-2]):
+        attendance_str = attendance_str.strip()
         present_hours = attendance_str.split("/")[0].strip()
         total_hours = attendance_str.split("/")[1].split("(")[0].strip()
-        attendance_percentage = re.search(r"\((.*?)\)", attendance_str).group(1).strip()
+        attendance_percentage = PERCENTAGE.search(attendance_str).group(1).strip()
+
+        response_body[subject_code] = {
+            "present_hours": present_hours,
+            "total_hours": total_hours,
+            "attendance_percentage": attendance_percentage,
+        }
 
-        subject_attendance = {}
-        subject_attendance["present_hours"] = present_hours
-        subject_attendance["total_hours"] = total_hours
-        subject_attendance["attendance_percentage"] = attendance_percentage
+    response_body["total_present_hours"] = table_data[-2].split("/")[0].strip()
+    response_body["total_hours"] = table_data[-2].split("/")[1].strip()
+    response_body["total_perecentage"] = table_data[-1]
 
-        response_body[subject_code] = subject_attendance
+    return response_body
 
-    response_body["total_present_hours"] = (
-        table_data[len(table_data) - 2].text.split("/")[0].strip()
+
+@bp.route("/attendance/calendar", methods=["GET"])
+@require_token_auth
+def attendance_calendar():
+    """Present, absent and other-status hours of one month from a single fetch."""
+    try:
+        month, semester, year = parse_calendar_args(request.args)
+        calendar = fetch_calendar(get_token(), month, semester, year)
+    except CalendarError as e:
+        return jsonify({"message": e.message}), e.status
+
+    # The calendar may be shared with concurrent requests, so it is copied
+    # rather than modified
+    data = dict(calendar)
+    data["totals"] = {
+        "present_hours": len(calendar["present_hours"]),
+        "absent_hours": len(calendar["absent_hours"]),
+        "other_hours": len(calendar["other_hours"]),
+    }
+    return (
+        jsonify({"message": "Successfully fetched data", "data": data}),
+        200,
     )
-    response_body["total_hours"] = (
-        table_data[len(table_data) - 2].text.split("/")[1].strip()
+
+
+@bp.route("/attendance/range", methods=["GET"])
+@require_token_auth
+def attendance_range():
+    """
+    Attendance of every month from ?from=YYYY-MM to ?to=YYYY-MM of a
+    semester, as one day by day timeline with totals per subject. The
+    months are fetched in parallel. Months that fail are listed under
+    "errors" and left out, unless every month fails.
+    """
+    try:
+        months, semester = parse_range_args(request.args)
+    except CalendarError as e:
+        return jsonify({"message": e.message}), e.status
+
+    token = get_token()
+
+    def load(year_month):
+        year, month = year_month
+        try:
+            return fetch_calendar(token, month, semester, year)
+        except CalendarError as e:
+            return e
+        except UpstreamError as e:
+            return CalendarError(f"{e.reason}. Please try again later.", 502)
+        except UpstreamUnavailable as e:
+            return CalendarError(f"{e.reason}. Please try again later.", 503)
+        except requests.exceptions.Timeout:
+            return CalendarError("ETLab took too long to respond", 504)
+        except requests.exceptions.RequestException:
+            return CalendarError("Could not connect to ETLab", 502)
+
+    results = bounded_map(
+        load,
+        months,
+        max_workers=Config.ATTENDANCE_RANGE_WORKERS,
+        timeout=Config.ATTENDANCE_RANGE_TIMEOUT,
+        on_timeout=lambda year_month: CalendarError("Timed out fetching the month", 504),
     )
-    response_body["total_perecentage"] = table_data[len(table_data) - 1].text
-    response_body["note"] = "ETLab attendance displays current semester subjects only, not filtered by requested semester"
 
-    return jsonify(response_body), 200
+    calendars, errors = [], []
+    for (year, month), result in zip(months, results):
+        if isinstance(result, CalendarError):
+            if result.status == 401:
+                return jsonify({"message": result.message}), 401
+            errors.append({"month": f"{year:04d}-{month:02d}", "message": result.message, "status": result.status})
+        else:
+            calendars.append(((year, month), result))
+
+    if not calendars:
+        return jsonify({"message": errors[0]["message"], "errors": errors}), errors[0]["status"]
+
+    data = {
+        "from": request.args["from"],
+        "to": request.args["to"],
+        "semester": semester,
+        **merge_calendars(calendars),
+        "errors": errors,
+    }
+    return jsonify({"message": "Successfully fetched data", "data": data}), 200
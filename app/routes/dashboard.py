@@ -0,0 +1,104 @@
+import time
+
+import requests
+from flask import Blueprint, jsonify, request
+
+from app.routes.academic_analysis import load_academic_analysis
+from app.routes.end_semester_results import load_end_semester_results
+from app.routes.profile import load_profile
+from app.routes.results import load_results
+from app.utils.concurrency import bounded_map
+from app.utils.resilience import UpstreamError, UpstreamUnavailable
+from app.utils.token_required import get_token, require_token_auth
+from config import Config
+
+bp = Blueprint("dashboard", __name__, url_prefix="/api")
+
+# section name -> loader(token, semester) returning (body, status)
+SECTIONS = {
+    "profile": lambda token, semester: load_profile(token),
+    "results": load_results,
+    "end_semester_results": load_end_semester_results,
+    "academic_analysis": lambda token, semester: load_academic_analysis(token),
+}
+
+
+@bp.route("/dashboard", methods=["GET"])
+@require_token_auth
+def dashboard():
+    """
+    Fetch profile, results, end semester results and academic analysis
+    concurrently and return them in one document. Each section carries its
+    own status and timing, so one failing section does not fail the rest.
+    """
+    semester = request.args.get("semester")
+    if semester:
+        try:
+            semester = int(semester)
+        except ValueError:
+            return jsonify({"message": "Semester should be a valid integer"}), 400
+        if not (1 <= semester <= 8):
+            return jsonify({"message": "Invalid semester. Must be between 1 and 8"}), 400
+    else:
+        semester = None
+
+    names = list(SECTIONS)
+    if request.args.get("sections"):
+        names = [name for name in request.args.get("sections").split(",") if name in SECTIONS]
+        if not names:
+            return jsonify({"message": f"Unknown sections. Available: {', '.join(SECTIONS)}"}), 400
+
+    token = get_token()
+    started = time.perf_counter()
+
+    def load(name):
+        section_started = time.perf_counter()
+        try:
+            body, status = SECTIONS[name](token, semester)
+        except UpstreamError as e:
+            body, status = {"message": f"{e.reason}. Please try again later."}, 502
+        except UpstreamUnavailable as e:
+            body, status = {"message": f"{e.reason}. Please try again later."}, 503
+        except requests.exceptions.Timeout:
+            body, status = {"message": "ETLab took too long to respond"}, 504
+        except requests.exceptions.RequestException:
+            body, status = {"message": "Could not connect to ETLab"}, 502
+        except Exception as e:
+            body, status = {"message": f"Error processing {name}: {e}"}, 500
+        return {
+            "status": status,
+            "ok": status == 200,
+            "elapsed_ms": round((time.perf_counter() - section_started) * 1000, 1),
+            "data": body,
+        }
+
+    def timed_out(name):
+        return {
+            "status": 504,
+            "ok": False,
+            "elapsed_ms": round(Config.DASHBOARD_SECTION_TIMEOUT * 1000, 1),
+            "data": {"message": f"Timed out loading {name}"},
+        }
+
+    loaded = bounded_map(
+        load,
+        names,
+        max_workers=Config.DASHBOARD_WORKERS,
+        timeout=Config.DASHBOARD_SECTION_TIMEOUT,
+        on_timeout=timed_out,
+    )
+    sections = dict(zip(names, loaded))
+
+    if all(section["status"] == 401 for section in sections.values()):
+        return jsonify({"message": "Token expired. Please login again."}), 401
+
+    return (
+        jsonify(
+            {
+                "ok": all(section["ok"] for section in sections.values()),
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+                "sections": sections,
+            }
+        ),
+        200,
+    )
@@ -1,74 +1,38 @@
 import requests
-from bs4 import BeautifulSoup
 from flask import Blueprint, jsonify, request
+import logging
 import re
 
-from app.utils.token_required import require_token_auth
+from app.utils import upstream
+from app.utils.conditional import conditional, partial_response
+from app.utils.html_parser import parse_html
+from app.utils.concurrency import bounded_map
+from app.utils.singleflight import coalesced
+from app.utils.tables import cell_texts, find_labelled_cells, find_table_with_header
+from app.utils.timing import timed
+from app.utils.token_required import get_token, require_token_auth
 from config import Config
 
 bp = Blueprint("end_semester_results", __name__, url_prefix="/api")
+logger = logging.getLogger(__name__)
 
 
-def scrape_detailed_results(url, headers, cookie, referer_url):
+def scrape_detailed_results(url, token, referer_url, timeout=None):
     """
     Scrapes the detailed result page with precise, robust selectors.
     """
     try:
         # Add the Referer header to the request to simulate site navigation
-        detail_headers = headers.copy()
-        detail_headers['Referer'] = referer_url
+        detail_headers = {'Referer': referer_url}
         
-        response = requests.get(url, headers=detail_headers, cookies=cookie)
+        response = upstream.get(url, token=token, headers=detail_headers, budget=timeout)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
 
         # Check if we were redirected to the login page
-        if soup.find("title") and "login" in soup.find("title").text.lower():
+        if upstream.is_login_page(response):
             return {"error": "Session invalid for detail page. Redirected to login.", "url": url}
 
-        # --- Part 1: Precisely find the exam details ---
-        exam_details = {}
-        labels = {"Name of Exam": "nameOfExam", "Degree": "degree", "Semester": "semester", 
-                  "Academic Year": "academicYear", "Month": "month", "Year": "year"}
-        
-        for label_text, key_name in labels.items():
-            # Find a <td> containing the exact label text (ignoring whitespace)
-            label_element = soup.find('td', string=re.compile(r'\s*' + re.escape(label_text) + r'\s*'))
-            if label_element:
-                # Find the very next <td> sibling, which holds the value
-                value_element = label_element.find_next_sibling('td')
-                if value_element:
-                    exam_details[key_name] = value_element.get_text(strip=True)
-
-        # --- Part 2: Precisely find the main results table ---
-        main_table = None
-        # Find all tables and loop through them
-        for table in soup.find_all("table"):
-            # The correct table is the one with a "Course Code" header
-            if table.find('th', string=re.compile(r'Course Code')):
-                main_table = table
-                break
-        
-        if not main_table:
-            return {"error": "Could not find the main results table with expected headers.", "url": url}
-        
-        # --- Part 3: Parse the now-correctly-identified table ---
-        subjects, summary = [], {}
-        headers_list = [th.text.strip() for th in main_table.find_all("th")]
-        rows = main_table.find("tbody").find_all("tr") if main_table.find("tbody") else main_table.find_all("tr")[1:]
-
-        for row in rows:
-            cols = row.find_all("td")
-            if not cols: continue
-            
-            first_col_text = cols[0].text.strip()
-            if "Earned Credit" in first_col_text: summary["earnedCredit"] = cols[1].text.strip() if len(cols) > 1 else None
-            elif "SGPA" in first_col_text: summary["sgpa"] = cols[1].text.strip() if len(cols) > 1 else None
-            elif "CGPA" in first_col_text: summary["cgpa"] = cols[1].text.strip() if len(cols) > 1 else None
-            elif len(cols) == len(headers_list):
-                subjects.append({headers_list[i]: cols[i].text.strip() for i in range(len(headers_list))})
-
-        return {"examDetails": exam_details, "results": subjects, "summary": summary}
+        return parse_detailed_results(parse_html(response.text, 'exam_detail'), url)
 
     except requests.exceptions.RequestException as e:
         return {"error": f"Failed to fetch result page: {e}", "url": url}
@@ -76,8 +40,52 @@ def scrape_detailed_results(url, headers, cookie, referer_url):
         return {"error": f"An error occurred while parsing result page: {e}", "url": url}
 
 
+# "Label | Value" rows of the exam details table
+EXAM_DETAIL_LABELS = {"Name of Exam": "nameOfExam", "Degree": "degree", "Semester": "semester",
+                      "Academic Year": "academicYear", "Month": "month", "Year": "year"}
+
+
+@timed("parse")
+def parse_detailed_results(soup, url):
+    """Extract the exam details, subject grades and SGPA/CGPA of a result page."""
+    # --- Part 1: Find the exam details, all labels in one pass over the cells ---
+    exam_details = {}
+    label_cells = find_labelled_cells(soup, list(EXAM_DETAIL_LABELS))
+    for label_text, key_name in EXAM_DETAIL_LABELS.items():
+        label_element = label_cells.get(label_text)
+        if label_element:
+            # The very next <td> sibling holds the value
+            value_element = label_element.find_next_sibling('td')
+            if value_element:
+                exam_details[key_name] = value_element.get_text(strip=True)
+
+    # --- Part 2: The main results table is the one with a "Course Code" header ---
+    main_table = find_table_with_header(soup, "Course Code")
+    if not main_table:
+        return {"error": "Could not find the main results table with expected headers.", "url": url}
+
+    # --- Part 3: Parse the now-correctly-identified table ---
+    subjects, summary = [], {}
+    headers_list = cell_texts(main_table.find_all("th"))
+    rows = main_table.find("tbody").find_all("tr") if main_table.find("tbody") else main_table.find_all("tr")[1:]
+
+    for row in rows:
+        cols = cell_texts(row.find_all("td"))
+        if not cols: continue
+
+        first_col_text = cols[0]
+        if "Earned Credit" in first_col_text: summary["earnedCredit"] = cols[1] if len(cols) > 1 else None
+        elif "SGPA" in first_col_text: summary["sgpa"] = cols[1] if len(cols) > 1 else None
+        elif "CGPA" in first_col_text: summary["cgpa"] = cols[1] if len(cols) > 1 else None
+        elif len(cols) == len(headers_list):
+            subjects.append(dict(zip(headers_list, cols)))
+
+    return {"examDetails": exam_details, "results": subjects, "summary": summary}
+
+
 @bp.route("/end-semester-results", methods=["GET"])
 @require_token_auth
+@conditional(max_age=Config.RESPONSE_MAX_AGES["end_semester_results"])
 def end_semester_results():
     semester = request.args.get("semester")
     if semester:
@@ -88,18 +96,30 @@ def end_semester_results():
         except ValueError:
             return jsonify({"message": "Semester should be a valid integer"}), 400
     
-    auth_header = request.headers.get("Authorization", "")
-    token = auth_header.split(" ")[1] if auth_header.startswith("Bearer ") else auth_header
-    
-    headers = {"User-Agent": Config.USER_AGENT}
-    cookie = {Config.COOKIE_KEY: token}
-    
+    body, status = load_end_semester_results(get_token(), semester)
+    if status == 200 and is_partial(body):
+        partial_response()
+    return jsonify(body), status
+
+
+def is_partial(body):
+    """Whether the list page failed to parse or a detail page failed."""
+    if "total_end_semester_exams" not in body:
+        return True
+    return any("error" in (link.get("results") or {}) for link in body["available_links"])
+
+
+@coalesced
+def load_end_semester_results(token, semester=None):
+    """Fetch the exam result list and every detail page. Returns (body, status)."""
     list_page_url = f"{Config.BASE_URL}/universityexam/student/examresult"
-    response = requests.get(list_page_url, headers=headers, cookies=cookie)
-    
-    soup = BeautifulSoup(response.text, "html.parser")
-    if soup.find("title") and "login" in soup.find("title").text.lower():
-        return jsonify({"message": "Token expired. Please login again."}), 401
+    response = upstream.get(list_page_url, token=token)
+    if upstream.is_login_page(response):
+        return {"message": "Token expired. Please login again."}, 401
+    if response.status_code != 200:
+        return {"message": f"ETLab answered the exam result list with HTTP {response.status_code}"}, 502
+
+    soup = parse_html(response.text, "exam_list")
 
     response_body = {"end_semester_exams": [], "available_links": []}
 
@@ -123,17 +143,24 @@ def end_semester_results():
                         href = Config.BASE_URL + href
                     exam_links.append({"text": link.text.strip(), "href": href})
         
-        # Scrape each link found
-        for link_info in exam_links:
-            # We use the list page URL as the Referer for the detail page request
-            detailed_results = scrape_detailed_results(link_info["href"], headers, cookie, list_page_url)
-            link_info["results"] = detailed_results
+        # Scrape the detail pages in parallel, keeping the link order.
+        # We use the list page URL as the Referer for the detail page request
+        timeout = Config.END_SEMESTER_DETAIL_TIMEOUT
+        detailed_results = bounded_map(
+            lambda link_info: scrape_detailed_results(link_info["href"], token, list_page_url, timeout),
+            exam_links,
+            max_workers=Config.END_SEMESTER_DETAIL_WORKERS,
+            timeout=timeout,
+            on_timeout=lambda link_info: {"error": "Timed out fetching result page", "url": link_info["href"]},
+        )
+        for link_info, results in zip(exam_links, detailed_results):
+            link_info["results"] = results
         
         response_body["available_links"] = exam_links
         response_body["total_end_semester_exams"] = len(response_body["end_semester_exams"])
 
-    except Exception as e:
-        print(f"Error parsing end semester results: {e}")
+    except Exception:
+        logger.exception("Error parsing end semester results")
 
     response_body["debug_info"] = {
         "requested_semester": semester,
@@ -141,7 +168,7 @@ def end_semester_results():
         "url_used": list_page_url,
     }
 
-    return jsonify(response_body), 200
+    return response_body, 200
 
 
 def parse_semester_from_text(exam_text):
@@ -1,11 +1,23 @@
 import requests
-from bs4 import BeautifulSoup
 from flask import Blueprint, jsonify, request
 
+from app.routes.attendance import attendance_path
+from app.routes.profile import load_profile
+from app.routes.timetable import load_timetable
+from app.utils import prefetch, upstream
+from app.utils.resilience import UpstreamUnavailable
 from config import Config
 
 bp = Blueprint("login", __name__, url_prefix="/api")
-session = requests.Session()
+
+
+def warm_attendance(token):
+    upstream.get(attendance_path(), token=token)
+
+
+# Pages a client asks for right after logging in, warmed in this order
+# when Config.PREFETCH_ENABLED is set
+WARM_UP = (load_profile, load_timetable, warm_attendance)
 
 
 @bp.route("/login", methods=["POST"])
@@ -18,33 +30,20 @@ def login():
         if not username or not password:
             return jsonify({"message": "Username and password is required"}), 401
 
-        payload = {
-            "LoginForm[username]": username,
-            "LoginForm[password]": password,
-            "yt0": "",
-        }
-
-        headers = {
-            "User-Agent": Config.USER_AGENT,
-            "Content-Type": "application/x-www-form-urlencoded",
-        }
-
-        response = session.post(
-            f"{Config.BASE_URL}/user/login", data=payload, headers=headers
-        )
+        response, cookies = upstream.login(username, password)
         
-        soup = BeautifulSoup(response.text, "html.parser")
-        title = soup.find("title")
-        if title and "login" in title.text.lower():
+        if upstream.is_login_page(response):
             return jsonify({"message": "Invalid username or password"}), 401
         
-        cookies = session.cookies.get_dict()
-        
         if Config.COOKIE_KEY not in cookies:
             return jsonify({"message": "Login failed - no session cookie"}), 401
             
         cookie = cookies[Config.COOKIE_KEY]
+        prefetch.submit(cookie, WARM_UP)
         return jsonify({"message": "Login successful", "token": cookie}), 200
         
+    except (UpstreamUnavailable, requests.exceptions.Timeout, requests.exceptions.ConnectionError):
+        # Answered by the app's handlers with 503, 504 and 502
+        raise
     except Exception as e:
         return jsonify({"message": "Internal server error"}), 500
@@ -1,9 +1,7 @@
-import requests
-from bs4 import BeautifulSoup
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify
 
-from app.utils.token_required import require_token_auth
-from config import Config
+from app.utils import prefetch, upstream
+from app.utils.token_required import get_token, require_token_auth
 
 bp = Blueprint("logout", __name__, url_prefix="/api")
 
@@ -11,25 +9,11 @@ bp = Blueprint("logout", __name__, url_prefix="/api")
 @bp.route("/logout", methods=["GET"])
 @require_token_auth
 def logout():
-    # Extract token from Authorization header (format: "Bearer <token>")
-    auth_header = request.headers.get("Authorization", "")
-    if auth_header.startswith("Bearer "):
-        token = auth_header.split(" ")[1]
-    else:
-        token = auth_header
-        
-    headers = {
-        "User-Agent": Config.USER_AGENT,
-    }
-    cookie = {Config.COOKIE_KEY: token}
-    response = requests.get(
-        f"{Config.BASE_URL}/user/logout",
-        headers=headers,
-        cookies=cookie,
-    )
-    soup = BeautifulSoup(response.text, "html.parser")
-    title = soup.find("title")
-    if title and "login" in title.text.lower():
+    token = get_token()
+    prefetch.cancel(token)
+    response = upstream.get("/user/logout", token=token)
+    upstream.forget_token(token)
+    if upstream.is_login_page(response):
         return (
             jsonify({"message": "Logged out successfully"}),
             200,
@@ -1,8 +1,11 @@
-import requests
-from bs4 import BeautifulSoup
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify
 
-from app.utils.token_required import require_token_auth
+from app.utils import upstream
+from app.utils.conditional import conditional
+from app.utils.html_parser import parse_html
+from app.utils.singleflight import coalesced
+from app.utils.timing import timed
+from app.utils.token_required import get_token, require_token_auth
 from config import Config
 
 bp = Blueprint("profile", __name__, url_prefix="/api")
@@ -10,28 +13,29 @@ bp = Blueprint("profile", __name__, url_prefix="/api")
 
 @bp.route("/profile", methods=["GET"])
 @require_token_auth
+@conditional(max_age=Config.RESPONSE_MAX_AGES["profile"])
 def profile():
-    # Extract token from Authorization header (format: "Bearer <token>")
-    auth_header = request.headers.get("Authorization", "")
-    if auth_header.startswith("Bearer "):
-        token = auth_header.split(" ")[1]
-    else:
-        token = auth_header
-    
-    headers = {
-        "User-Agent": Config.USER_AGENT,
-    }
-    cookie = {Config.COOKIE_KEY: token}
-    response = requests.get(
-        f"{Config.BASE_URL}/student/profile",
-        headers=headers,
-        cookies=cookie,
-    )
-    soup = BeautifulSoup(response.text, "html.parser")
-    title = soup.find("title")
-    if title and "login" in title.text.lower():
-        return jsonify({"message": "Token expired. Please login again."}), 401
+    body, status = load_profile(get_token())
+    return jsonify(body), status
+
+
+@coalesced
+def load_profile(token):
+    """Fetch and parse the profile page. Returns (body, status)."""
+    response = upstream.get("/student/profile", token=token)
+    if upstream.is_login_page(response):
+        return {"message": "Token expired. Please login again."}, 401
+    if response.status_code != 200:
+        return {"message": f"ETLab answered the profile page with HTTP {response.status_code}"}, 502
 
+    soup = parse_html(response.text, "profile")
+    # Return the organized profile data
+    return parse_profile(soup), 200
+
+
+@timed("parse")
+def parse_profile(soup):
+    """Collect every th/td pair of the profile page and group them into sections."""
     # Extract comprehensive profile data
     profile_data = {}
     
@@ -114,5 +118,4 @@ def profile():
         "message": "Successfully fetched comprehensive profile data"
     }
     
-    # Return the organized profile data
-    return jsonify(organized_profile), 200
+    return organized_profile
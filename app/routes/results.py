@@ -1,11 +1,16 @@
-import requests
-from bs4 import BeautifulSoup
+import logging
+
 from flask import Blueprint, jsonify, request
 
-from app.utils.token_required import require_token_auth
-from config import Config
+from app.utils import upstream
+from app.utils.html_parser import parse_html
+from app.utils.singleflight import coalesced
+from app.utils.tables import TableSpec, extract_sections
+from app.utils.timing import timed
+from app.utils.token_required import get_token, require_token_auth
 
 bp = Blueprint("results", __name__, url_prefix="/api")
+logger = logging.getLogger(__name__)
 
 
 @bp.route("/results", methods=["GET"])
@@ -31,215 +36,98 @@ def results():
         # If no semester provided, we'll fetch all available results
         semester = None
 
-    # Extract token from Authorization header (format: "Bearer <token>")
-    auth_header = request.headers.get("Authorization", "")
-    if auth_header.startswith("Bearer "):
-        token = auth_header.split(" ")[1]
-    else:
-        token = auth_header
-
-    headers = {
-        "User-Agent": Config.USER_AGENT,
-    }
-    cookie = {Config.COOKIE_KEY: token}
-    response = requests.get(
-        f"{Config.BASE_URL}/ktuacademics/student/results",
-        headers=headers,
-        cookies=cookie,
-    )
-    soup = BeautifulSoup(response.text, "html.parser")
-    title = soup.find("title")
-    if title and "login" in title.text.lower():
-        return jsonify({"message": "Token expired. Please login again."}), 401
-
-    response_body = {
-        "sessional_exams": [],
-        "module_tests": [],
-        "class_projects": [],
-        "assignments": [],
-        "tutorials": []
-    }
+    body, status = load_results(get_token(), semester)
+    return jsonify(body), status
+
+
+@coalesced
+def load_results(token, semester=None):
+    """Fetch and parse the results page. Returns (body, status)."""
+    response = upstream.get("/ktuacademics/student/results", token=token)
+    if upstream.is_login_page(response):
+        return {"message": "Token expired. Please login again."}, 401
+    if response.status_code != 200:
+        return {"message": f"ETLab answered the results page with HTTP {response.status_code}"}, 502
+
+    return parse_results(parse_html(response.text, "results"), semester), 200
+
+
+def _split_subject(text):
+    """Split "CS301 - Theory of Computation" into its code and name."""
+    if " - " in text:
+        parts = text.split(" - ")
+        return parts[0], parts[1]
+    return text, text
+
+
+def _no_entries_yet(texts):
+    return "No" in texts[0] and "yet" in texts[0]
+
+
+# Internal assessment tables of the results page, each found by the words
+# of its <h5> heading. Columns: Subject, Semester, Exam, Maximum Marks, Marks Obtained
+RESULT_SECTIONS = [
+    TableSpec(
+        "sessional_exams",
+        ("sessional", "exam"),
+        {
+            "subject_code": lambda texts: _split_subject(texts[0])[0],
+            "subject_name": lambda texts: _split_subject(texts[0])[1],
+            "semester": 1,
+            "exam": 2,
+            "maximum_marks": 3,
+            "marks_obtained": 4,
+        },
+        min_cells=5,
+        skip=_no_entries_yet,
+    ),
+    TableSpec(
+        "module_tests",
+        ("module", "test"),
+        {"subject": 0, "semester": 1, "exam": 2, "maximum_marks": 3, "marks_obtained": 4},
+        skip=lambda texts: "No module test yet" in texts[0],
+    ),
+    TableSpec(
+        "class_projects",
+        ("class", "project"),
+        {"subject": 0, "semester": 1, "class_project": 2, "maximum_marks": 3, "marks_obtained": 4},
+        skip=lambda texts: "No class projects yet" in texts[0],
+    ),
+    TableSpec(
+        "assignments",
+        ("assignment",),
+        {"subject": 0, "semester": 1, "assignment": 2, "maximum_marks": 3, "marks_obtained": 4},
+        skip=_no_entries_yet,
+    ),
+    TableSpec(
+        "tutorials",
+        ("tutorial",),
+        {"subject": 0, "semester": 1, "title": 2, "maximum_marks": 3, "marks_obtained": 4},
+        skip=_no_entries_yet,
+    ),
+]
+
+
+@timed("parse")
+def parse_results(soup, semester):
+    """Parse the internal assessment tables of the results page.
+
+    Rows are filtered to the requested semester when one is given.
+    """
+    response_body = {spec.name: [] for spec in RESULT_SECTIONS}
 
     try:
-        # Parse Sessional Exams (using robust search for header with whitespace)
-        sessional_section = soup.find("h5", string=lambda text: text and "sessional" in text.lower() and "exam" in text.lower())
-        if sessional_section:
-            print("DEBUG: Found Sessional exams section")
-            sessional_table = sessional_section.find_next("table")
-            if sessional_table:
-                print("DEBUG: Found sessional table")
-                rows = sessional_table.find_all("tr")[1:]  # Skip header row
-                print(f"DEBUG: Found {len(rows)} rows in sessional table")
-                for row in rows:
-                    cells = row.find_all("td")
-                    if len(cells) >= 5:  # Based on exploration: Subject, Semester, Exam, Maximum Marks, Marks Obtained
-                        subject_text = cells[0].text.strip()
-                        semester_text = cells[1].text.strip()
-                        
-                        print(f"DEBUG: Processing row - Subject: {subject_text}, Semester: {semester_text}")
-                        
-                        # Skip empty or "No ..." rows
-                        if "No" in subject_text and "yet" in subject_text:
-                            continue
-                            
-                        # Split subject code and name if they exist
-                        if " - " in subject_text:
-                            subject_code = subject_text.split(" - ")[0]
-                            subject_name = subject_text.split(" - ")[1]
-                        else:
-                            subject_code = subject_text
-                            subject_name = subject_text
-                        
-                        subject_info = {
-                            "subject_code": subject_code,
-                            "subject_name": subject_name,
-                            "semester": semester_text,
-                            "exam": cells[2].text.strip(),
-                            "maximum_marks": cells[3].text.strip(),
-                            "marks_obtained": cells[4].text.strip(),
-                        }
-                        
-                        # Filter by requested semester
-                        if semester_matches(semester_text, semester):
-                            response_body["sessional_exams"].append(subject_info)
-                            print(f"DEBUG: Added sessional exam: {subject_code}")
-
-        # Parse Module Tests (using robust search)
-        module_section = soup.find("h5", string=lambda text: text and "module" in text.lower() and "test" in text.lower())
-        if module_section:
-            print("DEBUG: Found Module Test section")
-            module_table = module_section.find_next("table")
-            if module_table:
-                print("DEBUG: Found module table")
-                rows = module_table.find_all("tr")[1:]  # Skip header row
-                print(f"DEBUG: Found {len(rows)} rows in module table")
-                for row in rows:
-                    cells = row.find_all("td")
-                    if len(cells) >= 1:
-                        first_cell = cells[0].text.strip()
-                        if "No module test yet" in first_cell:
-                            print("DEBUG: No module tests available")
-                            continue
-                            
-                        if len(cells) >= 5:
-                            test_info = {
-                                "subject": cells[0].text.strip(),
-                                "semester": cells[1].text.strip(),
-                                "exam": cells[2].text.strip(),
-                                "maximum_marks": cells[3].text.strip(),
-                                "marks_obtained": cells[4].text.strip(),
-                            }
-                            
-                            # Filter by requested semester
-                            if semester_matches(test_info["semester"], semester):
-                                response_body["module_tests"].append(test_info)
-                                print(f"DEBUG: Added module test: {test_info['subject']}")
+        sections = extract_sections(soup, RESULT_SECTIONS)
+        for name, records in sections.items():
+            response_body[name] = [
+                record for record in records if semester_matches(record["semester"], semester)
+            ]
 
-        # Parse Class Projects (using robust search)
-        projects_section = soup.find("h5", string=lambda text: text and "class" in text.lower() and "project" in text.lower())
-        if projects_section:
-            print("DEBUG: Found Class Projects section")
-            projects_table = projects_section.find_next("table")
-            if projects_table:
-                print("DEBUG: Found projects table")
-                rows = projects_table.find_all("tr")[1:]  # Skip header row
-                print(f"DEBUG: Found {len(rows)} rows in projects table")
-                for row in rows:
-                    cells = row.find_all("td")
-                    if len(cells) >= 1:
-                        first_cell = cells[0].text.strip()
-                        if "No class projects yet" in first_cell:
-                            print("DEBUG: No class projects available")
-                            continue
-                            
-                        if len(cells) >= 5:
-                            project_info = {
-                                "subject": cells[0].text.strip(),
-                                "semester": cells[1].text.strip(),
-                                "class_project": cells[2].text.strip(),
-                                "maximum_marks": cells[3].text.strip(),
-                                "marks_obtained": cells[4].text.strip(),
-                            }
-                            
-                            # Filter by requested semester
-                            if semester_matches(project_info["semester"], semester):
-                                response_body["class_projects"].append(project_info)
-                                print(f"DEBUG: Added class project: {project_info['subject']}")
-
-        # Parse Assignments (using robust search)
-        assignments_section = soup.find("h5", string=lambda text: text and "assignment" in text.lower())
-        if assignments_section:
-            print("DEBUG: Found Assignments section")
-            assignments_table = assignments_section.find_next("table")
-            if assignments_table:
-                print("DEBUG: Found assignments table")
-                rows = assignments_table.find_all("tr")[1:]  # Skip header row
-                print(f"DEBUG: Found {len(rows)} rows in assignments table")
-                for row in rows:
-                    cells = row.find_all("td")
-                    if len(cells) >= 1:
-                        first_cell = cells[0].text.strip()
-                        if "No" in first_cell and "yet" in first_cell:
-                            print("DEBUG: No assignments available")
-                            continue
-                            
-                        if len(cells) >= 5:
-                            assignment_info = {
-                                "subject": cells[0].text.strip(),
-                                "semester": cells[1].text.strip(),
-                                "assignment": cells[2].text.strip(),
-                                "maximum_marks": cells[3].text.strip(),
-                                "marks_obtained": cells[4].text.strip(),
-                            }
-                            
-                            # Filter by requested semester
-                            if semester_matches(assignment_info["semester"], semester):
-                                response_body["assignments"].append(assignment_info)
-                                print(f"DEBUG: Added assignment: {assignment_info['subject']}")
-
-        # Parse Tutorials (using robust search)
-        tutorials_section = soup.find("h5", string=lambda text: text and "tutorial" in text.lower())
-        if tutorials_section:
-            print("DEBUG: Found Tutorials section")
-            tutorials_table = tutorials_section.find_next("table")
-            if tutorials_table:
-                print("DEBUG: Found tutorials table")
-                rows = tutorials_table.find_all("tr")[1:]  # Skip header row
-                print(f"DEBUG: Found {len(rows)} rows in tutorials table")
-                for row in rows:
-                    cells = row.find_all("td")
-                    if len(cells) >= 1:
-                        first_cell = cells[0].text.strip()
-                        if "No" in first_cell and "yet" in first_cell:
-                            print("DEBUG: No tutorials available")
-                            continue
-                            
-                        if len(cells) >= 5:
-                            tutorial_info = {
-                                "subject": cells[0].text.strip(),
-                                "semester": cells[1].text.strip(),
-                                "title": cells[2].text.strip(),
-                                "maximum_marks": cells[3].text.strip(),
-                                "marks_obtained": cells[4].text.strip(),
-                            }
-                            
-                            # Filter by requested semester
-                            if semester_matches(tutorial_info["semester"], semester):
-                                response_body["tutorials"].append(tutorial_info)
-                                print(f"DEBUG: Added tutorial: {tutorial_info['subject']}")
-
-    except Exception as e:
+    except Exception:
         # Log the error but don't fail completely
-        print(f"Error parsing results: {e}")
+        logger.exception("Error parsing results")
         # Return empty results instead of failing
 
-    # Add debug information
-    print(f"Debug: Found {len(response_body['sessional_exams'])} sessional exams for semester {semester}")
-    print(f"Debug: Found {len(response_body['module_tests'])} module tests for semester {semester}")
-    print(f"Debug: Found {len(response_body['class_projects'])} class projects for semester {semester}")
-    print(f"Debug: Found {len(response_body['assignments'])} assignments for semester {semester}")
-    print(f"Debug: Found {len(response_body['tutorials'])} tutorials for semester {semester}")
-
     # Add summary information
     response_body["total_sessional_exams"] = len(response_body["sessional_exams"])
     response_body["total_module_tests"] = len(response_body["module_tests"])
@@ -255,7 +143,7 @@ def results():
         "note": "ETLab results may show current semester data regardless of requested semester parameter"
     }
 
-    return jsonify(response_body), 200
+    return response_body
 
 
 def semester_matches(semester_text, requested_semester):
@@ -289,7 +177,5 @@ def semester_matches(semester_text, requested_semester):
         for variant in semester_mapping[requested_semester]:
             if variant.lower() in semester_text_lower:
                 return True
-    
-    # Debug message for unmatched semesters
-    print(f"Debug: Semester text '{semester_text}' didn't match requested semester {requested_semester}")
+
     return False  # Only return matching semester results
\ No newline at end of file
@@ -1,4 +1,7 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, jsonify
+
+from app.utils import metrics, prefetch, upstream
+from app.utils.singleflight import loader_stats
 
 bp = Blueprint("status", __name__, url_prefix="/api")
 
@@ -6,3 +9,23 @@ bp = Blueprint("status", __name__, url_prefix="/api")
 @bp.route("/status", methods=["GET"])
 def get_status():
     return jsonify({"message": "I am alive", "status": "ok"})
+
+
+@bp.route("/status/upstream", methods=["GET"])
+def get_upstream_status():
+    return jsonify(
+        {
+            "status": "ok",
+            "upstream_pool": upstream.pool_stats(),
+            "upstream_cache": upstream.cache_stats(),
+            "loader_coalescing": loader_stats(),
+            "prefetch": prefetch.stats(),
+        }
+    )
+
+
+@bp.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Prometheus metrics, merged across all worker processes."""
+    body, content_type = metrics.render()
+    return Response(body, headers={"Content-Type": content_type})
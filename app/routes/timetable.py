@@ -1,58 +1,181 @@
 import csv
+from datetime import datetime
+from zoneinfo import ZoneInfo
 
-import requests
 from flask import Blueprint, jsonify, request
 
-from app.utils.token_required import require_token_auth
+from app.utils import upstream
+from app.utils.cache import TTLCache
+from app.utils.conditional import conditional
+from app.utils.singleflight import coalesced
+from app.utils.timing import record, timed
+from app.utils.token_required import get_token, require_token_auth
 from config import Config
 
 bp = Blueprint("timetable", __name__, url_prefix="/api")
 
+# token -> parsed timetable
+_timetables = TTLCache(Config.TIMETABLE_CACHE_MAX_BYTES)
+
+
+class PeriodClock:
+    """The period running at, and the next one after, any minute of the day.
+
+    periods is a comma separated list of "HH:MM-HH:MM" ranges, period 1
+    first. Both answers are looked up in a table of the 1440 minutes.
+    """
+
+    def __init__(self, periods):
+        self.periods = []
+        for period in periods.split(","):
+            start, end = (_minutes(clock) for clock in period.strip().split("-"))
+            self.periods.append((start, end))
+
+        self._minutes = []
+        for minute in range(24 * 60):
+            current = next((i for i, (start, end) in enumerate(self.periods) if start <= minute < end), None)
+            upcoming = next((i for i, (start, _) in enumerate(self.periods) if start > minute), None)
+            self._minutes.append((current, upcoming))
+
+    def at(self, minute):
+        """(current, next) period indexes at minute of the day, each possibly None."""
+        return self._minutes[minute]
+
+    def bounds(self, index):
+        start, end = self.periods[index]
+        return _clock(start), _clock(end)
+
+
+def _minutes(clock):
+    hours, minutes = clock.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _clock(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+clock = PeriodClock(Config.TIMETABLE_PERIODS)
+
 
 @bp.route("/timetable", methods=["GET"])
 @require_token_auth
+@conditional(max_age=Config.RESPONSE_MAX_AGES["timetable"])
 def timetable():
-    # Extract token from Authorization header (format: "Bearer <token>")
-    auth_header = request.headers.get("Authorization", "")
-    if auth_header.startswith("Bearer "):
-        token = auth_header.split(" ")[1]
-    else:
-        token = auth_header
-        
-    headers = {
-        "User-Agent": Config.USER_AGENT,
-    }
-
-    cookie = {Config.COOKIE_KEY: token}
-    response = requests.get(
-        f"{Config.BASE_URL}/student/timetable?format=csv&yt0=",
-        headers=headers,
-        cookies=cookie,
-    )
-    if response.status_code == 200:
-        csv_data = response.text
-
-        timetable = {}
-
-        csv_reader = csv.reader(csv_data.splitlines(), delimiter=",", quotechar='"')
-        headers = next(csv_reader)
-        next(csv_reader)
-
-        for row in csv_reader:
-            day = row[0]
-            timetable[day.lower()] = {}
-
-            for i, period in enumerate(row[1:], start=1):
-                period_name = f"period-{i}"
-                period_data = {"name": period.strip()}
-
-                if "<br/>[ Theory ]<br/>" in period:
-                    parts = period.split("<br/>[ Theory ]<br/>")
-                    period_data["name"] = parts[0].strip()
-                    period_data["teacher"] = parts[1].strip()
-
-                timetable[day.lower()][period_name] = period_data
-
-        return jsonify(timetable), 200
+    body, status = load_timetable(get_token())
+    return jsonify(body), status
+
+
+@bp.route("/timetable/now", methods=["GET"])
+@require_token_auth
+def timetable_now():
+    """
+    The current and next period of today's timetable. Pass at=<ISO date
+    and time> to ask about another moment; times without an offset are in
+    Config.TIMEZONE. Served from the parsed timetable cache when possible.
+    """
+    zone = ZoneInfo(Config.TIMEZONE)
+    if request.args.get("at"):
+        try:
+            now = datetime.fromisoformat(request.args["at"])
+        except ValueError:
+            return jsonify({"message": "at should be an ISO date and time, e.g. 2024-03-04T10:15"}), 400
+        now = now.replace(tzinfo=zone) if now.tzinfo is None else now.astimezone(zone)
     else:
-        return jsonify({"message": "Time table data not found"}), 404
+        now = datetime.now(zone)
+
+    timetable, status = load_timetable(get_token())
+    if status != 200:
+        return jsonify(timetable), status
+
+    day = now.strftime("%A").lower()
+    periods = timetable.get(day)
+    # No row for the day means no classes at all
+    current, upcoming = clock.at(now.hour * 60 + now.minute) if periods else (None, None)
+    return jsonify(
+        {
+            "day": day,
+            "time": now.strftime("%H:%M"),
+            "current": _period(periods, current),
+            "next": _period(periods, upcoming),
+        }
+    ), 200
+
+
+def _period(periods, index):
+    if index is None:
+        return None
+    name = f"period-{index + 1}"
+    start, end = clock.bounds(index)
+    return {"period": name, "start": start, "end": end, **periods.get(name, {"name": ""})}
+
+
+@coalesced
+def load_timetable(token):
+    """
+    Fetch and parse the timetable of token. Returns (body, status).
+    Parsed timetables are cached for Config.TIMETABLE_CACHE_TTL seconds;
+    the body is shared and must not be modified.
+    """
+    if upstream.token_expired(token):
+        forget_timetable(token)
+        return {"message": "Token expired. Please login again."}, 401
+
+    if not upstream.cache_bypassed():
+        timetable = _timetables.get(token)
+        if timetable is not None:
+            record("cache_hit")
+            return timetable, 200
+
+    response = upstream.get("/student/timetable?format=csv&yt0=", token=token)
+    if response.status_code != 200:
+        return {"message": "Time table data not found"}, 404
+    if upstream.is_login_page(response):
+        return {"message": "Token expired. Please login again."}, 401
+
+    timetable = parse_timetable(response.text)
+    # A rough size: the parsed dicts take a few times the CSV
+    _timetables.set(token, timetable, _timetable_ttl(), 4 * len(response.text))
+    return timetable, 200
+
+
+def _timetable_ttl():
+    # With token states kept per process, a worker does not learn that
+    # another one saw the token log out or expire
+    if upstream.token_states_shared():
+        return Config.TIMETABLE_CACHE_TTL
+    return min(Config.TIMETABLE_CACHE_TTL, Config.TIMETABLE_CACHE_LOCAL_TTL)
+
+
+def forget_timetable(token):
+    _timetables.discard(lambda key: key == token)
+
+
+upstream.register_token_cache(forget_timetable)
+
+
+@timed("parse")
+def parse_timetable(csv_data):
+    """Turn the CSV export of the timetable into day -> period -> subject."""
+    timetable = {}
+
+    csv_reader = csv.reader(csv_data.splitlines(), delimiter=",", quotechar='"')
+    headers = next(csv_reader)
+    next(csv_reader)
+
+    for row in csv_reader:
+        day = row[0]
+        timetable[day.lower()] = {}
+
+        for i, period in enumerate(row[1:], start=1):
+            period_name = f"period-{i}"
+            period_data = {"name": period.strip()}
+
+            if "<br/>[ Theory ]<br/>" in period:
+                parts = period.split("<br/>[ Theory ]<br/>")
+                period_data["name"] = parts[0].strip()
+                period_data["teacher"] = parts[1].strip()
+
+            timetable[day.lower()][period_name] = period_data
+
+    return timetable
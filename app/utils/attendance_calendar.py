@@ -0,0 +1,228 @@
+import logging
+import re
+
+from app.utils import upstream
+from app.utils.html_parser import parse_html
+from app.utils.singleflight import coalesced
+from app.utils.timing import timed
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+ATTENDANCE_PATH = "/ktuacademics/student/attendance"
+DAY_SUFFIXES = ("st", "nd", "rd", "th")
+YEAR_MONTH = re.compile(r"^(\d{4})-(\d{2})$")
+
+
+class CalendarError(Exception):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def parse_calendar_args(args):
+    """Validate the month, semester and year query parameters.
+
+    Raises CalendarError with a 400 status on invalid input.
+    """
+    try:
+        month = int(args.get("month"))
+        semester = int(args.get("semester"))
+        year = int(args.get("year"))
+    except (ValueError, TypeError):
+        raise CalendarError("Invalid parameters", 400)
+
+    if not (month >= 1 and month <= 12):
+        raise CalendarError("Invalid month", 400)
+
+    if not (semester >= 1 and semester <= 8):
+        raise CalendarError("Invalid semester", 400)
+
+    return month, semester, year
+
+
+def parse_range_args(args):
+    """Validate the from, to (YYYY-MM) and semester query parameters of a range.
+
+    Returns the (year, month) pairs from the first month to the last and
+    the semester. Raises CalendarError with a 400 status on invalid input.
+    """
+    bounds = []
+    for name in ("from", "to"):
+        match = YEAR_MONTH.match(args.get(name) or "")
+        if not match or not 1 <= int(match.group(2)) <= 12:
+            raise CalendarError(f"{name} should be a month as YYYY-MM", 400)
+        bounds.append((int(match.group(1)), int(match.group(2))))
+
+    try:
+        semester = int(args.get("semester"))
+    except (ValueError, TypeError):
+        raise CalendarError("Invalid semester", 400)
+    if not (semester >= 1 and semester <= 8):
+        raise CalendarError("Invalid semester", 400)
+
+    (first_year, first_month), (last_year, last_month) = bounds
+    count = (last_year - first_year) * 12 + last_month - first_month + 1
+    if count < 1:
+        raise CalendarError("from should not be after to", 400)
+    if count > Config.ATTENDANCE_RANGE_MAX_MONTHS:
+        raise CalendarError(f"A range can span at most {Config.ATTENDANCE_RANGE_MAX_MONTHS} months", 400)
+
+    months = []
+    for index in range(first_month - 1, first_month - 1 + count):
+        months.append((first_year + index // 12, index % 12 + 1))
+    return months, semester
+
+
+@coalesced
+def fetch_calendar(token, month, semester, year):
+    """Fetch one month of the attendance calendar and parse it.
+
+    The page lists every hour of the month, so present, absent and any
+    other status are all extracted from the same fetch. Months that have
+    ended are cached as immutable (see app.utils.cache_policy).
+    """
+    payload = {
+        "month": month,
+        "semester": (8 + semester),
+        "year": year,
+    }
+    response = upstream.post(ATTENDANCE_PATH, token=token, data=payload)
+    if response.status_code != 200:
+        raise CalendarError("Failed to fetch data", 500)
+
+    if upstream.is_login_page(response):
+        raise CalendarError("Token expired. Please login again.", 401)
+
+    soup = parse_html(response.text, "attendance_calendar")
+
+    try:
+        return parse_calendar(soup)
+    except Exception:
+        logger.exception("Failed to parse attendance calendar")
+        raise CalendarError("Failed to parse data", 500)
+
+
+@timed("parse")
+def parse_calendar(soup):
+    semester_element = soup.find("select", {"name": "semester"}).find(
+        "option", {"selected": "selected"}
+    )
+    month_element = soup.find("select", {"name": "month"}).find(
+        "option", {"selected": "selected"}
+    )
+    year = (
+        soup.find("select", {"name": "year"})
+        .find("option", {"selected": "selected"})
+        .text
+    ).strip()
+
+    present_hours, absent_hours, other_hours = [], [], []
+
+    table = soup.find("table", {"id": "itsthetable"})
+    for row in table.select("tbody tr"):
+        day = row.find("th").text.strip()
+        cols = row.find_all("td")
+
+        if len(cols) == 1:
+            continue
+
+        if day.endswith(DAY_SUFFIXES):
+            day = day[:-2]
+
+        for hour, col in enumerate(cols, start=1):
+            classes = col.get("class") or []
+            if "present" in classes:
+                present_hours.append(_hour_entry(day, hour, col.text))
+            elif "absent" in classes:
+                absent_hours.append(_hour_entry(day, hour, col.text))
+            elif classes and col.text.strip():
+                entry = _hour_entry(day, hour, col.text)
+                entry["status"] = classes[0]
+                other_hours.append(entry)
+
+    return {
+        "month": month_element.get_text(strip=True).lower(),
+        "month_num": month_element["value"],
+        "semester": semester_element.get_text(strip=True).lower(),
+        "semester_num": semester_element["value"],
+        "year": year,
+        "present_hours": present_hours,
+        "absent_hours": absent_hours,
+        "other_hours": other_hours,
+    }
+
+
+def _hour_entry(day, hour, text):
+    if "-" in text:
+        subject_code, subject_name = text.split("-")[0], text.split("-")[1]
+        subject_name = subject_name.strip().split("\n")[0]
+    else:
+        subject_code, subject_name = text, ""
+
+    return {
+        "day": int(day),
+        "hour": hour,
+        "subject_code": subject_code.strip(),
+        "subject_name": subject_name.strip(),
+    }
+
+
+def calendar_view(calendar, *statuses):
+    """Select the given hour lists of a parsed calendar, keeping the header fields."""
+    view = {
+        key: calendar[key]
+        for key in ("month", "month_num", "semester", "semester_num", "year")
+    }
+    for status in statuses:
+        view[f"{status}_hours"] = calendar[f"{status}_hours"]
+    return view
+
+
+def merge_calendars(calendars):
+    """Merge parsed months into one timeline with totals per subject.
+
+    calendars is a list of ((year, month), calendar) pairs in date order.
+    The timeline has one entry per day with attendance, each listing its
+    hours with their status.
+    """
+    days = {}
+    subjects = {}
+    for (year, month), calendar in calendars:
+        for status, entries in (
+            ("present", calendar["present_hours"]),
+            ("absent", calendar["absent_hours"]),
+            ("other", calendar["other_hours"]),
+        ):
+            for entry in entries:
+                date = f"{year:04d}-{month:02d}-{entry['day']:02d}"
+                days.setdefault(date, []).append(
+                    {
+                        "hour": entry["hour"],
+                        "status": entry.get("status", status),
+                        "subject_code": entry["subject_code"],
+                        "subject_name": entry["subject_name"],
+                    }
+                )
+
+                totals = subjects.get(entry["subject_code"])
+                if totals is None:
+                    totals = subjects[entry["subject_code"]] = {
+                        "subject_name": entry["subject_name"],
+                        "present": 0,
+                        "absent": 0,
+                        "other": 0,
+                    }
+                totals[status] += 1
+
+    for totals in subjects.values():
+        counted = totals["present"] + totals["absent"]
+        totals["total"] = counted + totals["other"]
+        totals["attendance_percentage"] = round(100 * totals["present"] / counted, 2) if counted else None
+
+    timeline = [
+        {"date": date, "hours": sorted(hours, key=lambda hour: hour["hour"])}
+        for date, hours in sorted(days.items())
+    ]
+    return {"timeline": timeline, "subjects": subjects}
@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+
+class CachedResponse:
+    """Snapshot of an upstream response that can be served again.
+
+    Exposes the parts of requests.Response the routes rely on.
+    """
+
+    __slots__ = ("status_code", "url", "text", "headers")
+
+    history = ()
+
+    def __init__(self, status_code, url, text, headers):
+        self.status_code = status_code
+        self.url = url
+        self.text = text
+        self.headers = headers
+
+    @classmethod
+    def from_response(cls, response):
+        return cls(
+            response.status_code,
+            response.url,
+            response.text,
+            dict(response.headers),
+        )
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def content(self):
+        return self.text.encode("utf-8")
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.exceptions.HTTPError(
+                f"{self.status_code} Error for url: {self.url}", response=self
+            )
+
+
+class TTLCache:
+    """Thread safe LRU cache bounded by an estimate of its size in bytes.
+
+    Every entry carries its own time to live; expired entries are dropped
+    when they are looked up or reach the LRU end.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at, size = entry
+            if expires_at <= now:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl, size):
+        with self._lock:
+            # The old value goes even when the new one is not kept, so
+            # that a refresh never leaves a stale entry behind
+            if key in self._entries:
+                self._remove(key)
+            if ttl <= 0 or size > self.max_bytes:
+                return
+
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def discard(self, predicate):
+        """Remove every entry whose key satisfies predicate."""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                self._remove(key)
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
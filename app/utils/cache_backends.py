@@ -0,0 +1,362 @@
+"""Storage backends of the upstream page cache.
+
+The in-process TTLCache gives every gunicorn worker its own copy, so the
+hit rate falls with the worker count. The shared backends keep one copy:
+
+- MemoryBackend: the TTLCache of the current process.
+- SQLiteBackend: a SQLite file in WAL mode shared by the workers of one host.
+- RedisBackend: any server speaking the Redis protocol, shared by all nodes.
+
+Every backend stores bytes produced by EntryCodec, which compresses the
+page and, given a Fernet key, encrypts it, since the pages hold personal
+data. Keys contain a hash of the session token, never the token itself.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from app.utils.cache import CachedResponse, TTLCache
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+
+    HAS_CRYPTOGRAPHY = True
+except ImportError:
+    HAS_CRYPTOGRAPHY = False
+
+try:
+    import redis
+
+    HAS_REDIS = True
+except ImportError:
+    HAS_REDIS = False
+
+logger = logging.getLogger("app")
+
+# First byte of an encoded entry
+_RAW = b"r"
+_ZLIB = b"z"
+
+
+class EntryCodec:
+    """Turn a CachedResponse into bytes for a backend and back.
+
+    compression is the zlib level, 0 to store pages as they are. With
+    encryption_key (a Fernet key) entries are encrypted and authenticated;
+    an entry that fails to decrypt is treated as missing.
+    """
+
+    def __init__(self, compression=1, encryption_key=None):
+        self.compression = compression
+        self._fernet = None
+        if encryption_key:
+            if not HAS_CRYPTOGRAPHY:
+                raise RuntimeError("Encrypting the upstream cache needs `pip install cryptography`")
+            self._fernet = Fernet(encryption_key)
+
+    def encode(self, response):
+        data = json.dumps(
+            [response.status_code, response.url, response.text, response.headers],
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+        if self.compression:
+            data = _ZLIB + zlib.compress(data, self.compression)
+        else:
+            data = _RAW + data
+        if self._fernet is not None:
+            data = self._fernet.encrypt(data)
+        return data
+
+    def decode(self, data):
+        if self._fernet is not None:
+            try:
+                data = self._fernet.decrypt(data)
+            except InvalidToken:
+                return None
+        kind, data = data[:1], data[1:]
+        if kind == _ZLIB:
+            data = zlib.decompress(data)
+        elif kind != _RAW:
+            return None
+        return CachedResponse(*json.loads(data))
+
+
+def store_key(key):
+    """Backend key of an upstream cache_key() tuple.
+
+    The token is hashed separately so that token_prefix() can find every
+    entry of one session.
+    """
+    token, *request = key
+    return token_prefix(token) + hashlib.sha256(repr(request).encode("utf-8")).hexdigest()
+
+
+def token_prefix(token):
+    return hashlib.sha256(str(token).encode("utf-8")).hexdigest()[:32] + ":"
+
+
+class CacheBackend:
+    """Byte store with per-entry TTLs.
+
+    Subclasses implement _get, _set and _discard_prefix. A failing backend
+    must not fail the request: errors are logged and count as misses, and
+    the backend is left alone for retry_after seconds before it is tried
+    again.
+    """
+
+    name = "backend"
+    retry_after = 5.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key):
+        value = self._call(self._get, key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value, ttl):
+        if ttl > 0:
+            self._call(self._set, key, value, ttl)
+
+    def discard_prefix(self, prefix):
+        self._call(self._discard_prefix, prefix)
+
+    def _call(self, method, *args):
+        if time.monotonic() < self._down_until:
+            return None
+        try:
+            return method(*args)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+                self._down_until = time.monotonic() + self.retry_after
+            logger.warning("%s cache backend failed, bypassing it for %ss: %s", self.name, self.retry_after, e)
+            return None
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": self.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "errors": self.errors,
+            }
+
+
+class MemoryBackend(CacheBackend):
+    """Entries in a TTLCache of this process."""
+
+    name = "memory"
+
+    def __init__(self, max_bytes):
+        super().__init__()
+        self._cache = TTLCache(max_bytes)
+
+    def _get(self, key):
+        return self._cache.get(key)
+
+    def _set(self, key, value, ttl):
+        self._cache.set(key, value, ttl, len(value) + len(key) + 64)
+
+    def _discard_prefix(self, prefix):
+        self._cache.discard(lambda key: key.startswith(prefix))
+
+    def stats(self):
+        stats = self._cache.stats()
+        stats.update(backend=self.name, errors=self.errors)
+        return stats
+
+
+class SQLiteBackend(CacheBackend):
+    """Entries in a SQLite database shared by the processes of one host.
+
+    WAL mode lets readers in every worker proceed while one of them writes.
+    Each thread has its own connection. Expired entries are pruned, and
+    the entries closest to expiry evicted above max_bytes, every
+    prune_every writes. Keys are stored under namespace, and max_bytes
+    bounds only the entries of that namespace, so several backends can
+    share one file.
+    """
+
+    name = "sqlite"
+    prune_every = 100
+
+    def __init__(self, path, max_bytes, namespace="etlab-api:page:", timeout=2.0):
+        super().__init__()
+        self.path = path
+        self.max_bytes = max_bytes
+        self.namespace = namespace
+        self.timeout = timeout
+        self._local = threading.local()
+        self._writes = 0
+        self._create_private(path)
+        self._connect().executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at);
+            """
+        )
+
+    @staticmethod
+    def _create_private(path):
+        """Create the database file readable by this user only.
+
+        Entries hold personal data and the default path is in the shared
+        temp directory. SQLite gives the -wal and -shm files the mode of
+        the database. A file that belongs to someone else cannot be made
+        private, so it raises.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            os.fchmod(fd, 0o600)
+        finally:
+            os.close(fd)
+
+    def _connect(self):
+        # Connections must not cross a fork, so they are keyed on the pid
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _get(self, key):
+        row = self._connect().execute(
+            "SELECT value FROM entries WHERE key = ? AND expires_at > ?", (self.namespace + key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, key, value, ttl):
+        if len(value) > self.max_bytes:
+            return
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, expires_at) VALUES (?, ?, ?, ?)",
+            (self.namespace + key, value, len(value), time.time() + ttl),
+        )
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.prune_every == 0
+        if prune:
+            self.prune(conn)
+
+    def prune(self, conn=None):
+        conn = conn or self._connect()
+        # Expired entries of any namespace can go
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        namespace = (len(self.namespace), self.namespace)
+        (total,) = conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries WHERE substr(key, 1, ?) = ?", namespace
+        ).fetchone()
+        if total > self.max_bytes:
+            # Drop the entries that would expire first until the rest fit
+            conn.execute(
+                """
+                DELETE FROM entries WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (ORDER BY expires_at DESC) AS kept
+                        FROM entries WHERE substr(key, 1, ?) = ?
+                    ) WHERE kept > ?
+                )
+                """,
+                (*namespace, self.max_bytes),
+            )
+
+    def _discard_prefix(self, prefix):
+        prefix = self.namespace + prefix
+        self._connect().execute(
+            "DELETE FROM entries WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+        )
+
+    def stats(self):
+        stats = super().stats()
+        try:
+            entries, size = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries WHERE substr(key, 1, ?) = ?",
+                (len(self.namespace), self.namespace),
+            ).fetchone()
+            stats.update(entries=entries, bytes=size)
+        except sqlite3.Error:
+            pass
+        stats.update(max_bytes=self.max_bytes)
+        return stats
+
+
+class RedisBackend(CacheBackend):
+    """Entries in a Redis compatible server, shared by every node.
+
+    Keys expire on the server; their total size is bounded by its
+    maxmemory setting rather than here.
+    """
+
+    name = "redis"
+
+    def __init__(self, url, namespace="etlab-api:page:", timeout=0.5):
+        super().__init__()
+        if not HAS_REDIS:
+            raise RuntimeError("The redis cache backend needs `pip install redis`")
+        self.namespace = namespace
+        # RESP2 is understood by every Redis compatible server, old or new
+        self._client = redis.Redis.from_url(
+            url, protocol=2, socket_timeout=timeout, socket_connect_timeout=timeout
+        )
+
+    def _get(self, key):
+        return self._client.get(self.namespace + key)
+
+    def _set(self, key, value, ttl):
+        self._client.set(self.namespace + key, value, px=max(1, int(ttl * 1000)))
+
+    def _discard_prefix(self, prefix):
+        keys = list(self._client.scan_iter(match=self.namespace + prefix + "*", count=500))
+        if keys:
+            self._client.delete(*keys)
+
+
+def create_backend(name, max_bytes, sqlite_path=None, redis_url=None, namespace="etlab-api:page:"):
+    """Backend called name.
+
+    namespace keeps apart backends that share a SQLite file or a Redis
+    server; memory backends never share.
+    """
+    if name == "memory":
+        return MemoryBackend(max_bytes)
+    if name == "sqlite":
+        try:
+            return SQLiteBackend(sqlite_path, max_bytes, namespace=namespace)
+        except (OSError, sqlite3.Error) as e:
+            # Like a backend failing later on, this must not fail requests
+            logger.warning("Cannot open the sqlite cache at %s, keeping entries in memory: %s", sqlite_path, e)
+            return MemoryBackend(max_bytes)
+    if name == "redis":
+        return RedisBackend(redis_url, namespace=namespace)
+    raise ValueError(f"Unknown cache backend {name!r}, expected memory, sqlite or redis")
@@ -0,0 +1,108 @@
+"""How long, and in which tier, an upstream response may be cached.
+
+Most ETLab pages change: today's attendance, this semester's marks. They
+are volatile and cached briefly, with a TTL per path prefix
+(Config.UPSTREAM_CACHE_TTLS). Some pages can never change again, such as
+the attendance calendar of a month that has ended or the detail page of a
+published exam result. Those are immutable. They are kept for
+Config.UPSTREAM_IMMUTABLE_TTL in their own tier, on disk by default, so
+they survive restarts.
+"""
+
+from collections import namedtuple
+from datetime import datetime
+from urllib.parse import urlsplit
+from zoneinfo import ZoneInfo
+
+from config import Config
+
+VOLATILE = "volatile"
+IMMUTABLE = "immutable"
+
+CacheDecision = namedtuple("CacheDecision", "tier ttl rule")
+
+
+class ImmutableRule:
+    """Requests to path whose response can no longer change.
+
+    applies(data) decides from the form payload (or query) of the request,
+    and confirms(response) checks the response before it is stored as
+    immutable, e.g. that a result is actually published. Responses that
+    fail the check are cached as volatile.
+    """
+
+    def __init__(self, name, path, method="GET", applies=None, confirms=None):
+        self.name = name
+        self.path = path
+        self.method = method
+        self.applies = applies
+        self.confirms = confirms
+
+    def matches(self, method, path, data):
+        if method != self.method or path != self.path:
+            return False
+        return self.applies is None or self.applies(data or {})
+
+    def accepts(self, response):
+        return self.confirms is None or self.confirms(response)
+
+
+class CachePolicy:
+    def __init__(self, ttls, immutable_ttl=0, rules=()):
+        self.ttls = ttls
+        self.immutable_ttl = immutable_ttl
+        self.rules = list(rules) if immutable_ttl > 0 else []
+
+    def classify(self, method, url, data=None):
+        """CacheDecision of a request; a ttl of 0 means it is not cached."""
+        path = urlsplit(url).path
+        method = method.upper()
+        for rule in self.rules:
+            if rule.matches(method, path, data):
+                return CacheDecision(IMMUTABLE, self.immutable_ttl, rule)
+        return CacheDecision(VOLATILE, self.volatile_ttl(url), None)
+
+    def volatile_ttl(self, url):
+        return longest_prefix(self.ttls, url, 0)
+
+
+def longest_prefix(table, url, default):
+    """Value of the longest path prefix of url found in table."""
+    path = urlsplit(url).path
+    value = default
+    matched = ""
+    for prefix, prefix_value in table.items():
+        if path.startswith(prefix) and len(prefix) > len(matched):
+            matched, value = prefix, prefix_value
+    return value
+
+
+def is_past_month(year, month):
+    """Whether the month has ended in the college's time zone."""
+    now = datetime.now(ZoneInfo(Config.TIMEZONE))
+    return (year, month) < (now.year, now.month)
+
+
+def _past_month(data):
+    try:
+        return is_past_month(int(data["year"]), int(data["month"]))
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+IMMUTABLE_RULES = [
+    # The calendar of a month that has ended, as posted by fetch_calendar()
+    ImmutableRule(
+        "past_attendance_month",
+        "/ktuacademics/student/attendance",
+        method="POST",
+        applies=_past_month,
+    ),
+    # Detail pages linked from the exam result list; only pages that show
+    # the grade table are results that have been published
+    ImmutableRule(
+        "published_exam_result",
+        "/universityexam/student/viewresult",
+        confirms=lambda response: "Course Code" in response.text,
+    ),
+]
@@ -0,0 +1,75 @@
+"""Compression of API responses.
+
+JSON responses of at least Config.COMPRESS_MIN_BYTES are compressed with
+the best encoding the client accepts: brotli when the brotli package is
+installed, otherwise gzip. Compression is timed as the "compress" phase.
+"""
+
+import gzip
+
+from flask import request
+
+from app.utils.timing import phase
+from config import Config
+
+try:
+    import brotli
+
+    HAS_BROTLI = True
+except ImportError:
+    HAS_BROTLI = False
+
+
+def available_encodings():
+    """Encodings the server can produce, best first."""
+    return ("br", "gzip") if HAS_BROTLI else ("gzip",)
+
+
+def choose_encoding(accept_encodings):
+    """Best available encoding the client accepts, or None."""
+    best, best_quality = None, 0
+    for encoding in available_encodings():
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=Config.COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=Config.COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+def init_app(app):
+    # Registered last, so it runs before the other after_request hooks and
+    # the compress phase shows up in their timings
+    @app.after_request
+    def compress_response(response):
+        if (
+            not Config.COMPRESS_ENABLED
+            or response.direct_passthrough
+            or response.is_streamed
+            or response.mimetype not in Config.COMPRESS_MIMETYPES
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        data = response.get_data()
+        if len(data) < Config.COMPRESS_MIN_BYTES:
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        with phase("compress"):
+            response.set_data(compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        # The compressed bytes differ from the ones the ETag was computed
+        # for, so it can only stand as a weak validator
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,78 @@
+import contextvars
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def bounded_map(func, items, max_workers, timeout=None, on_timeout=None):
+    """Apply func to every item on at most max_workers threads.
+
+    Results are returned in the order of items. timeout is the budget of a
+    single item, counted from when a thread starts running it; an item
+    still running after that long is abandoned and replaced by
+    on_timeout(item) (None by default). An abandoned item keeps its thread
+    until func returns, so the items queued behind it may start late. An
+    item that has not started by the time every batch of max_workers items
+    could have used its full budget is abandoned as well.
+    Each call runs in a copy of the caller's context, so Flask's request
+    and app globals stay reachable from the worker threads.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    workers = max(1, min(max_workers, len(items)))
+    started = [None] * len(items)
+
+    def run(index, item):
+        started[index] = time.monotonic()
+        return func(item)
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = [
+            executor.submit(contextvars.copy_context().run, run, index, item)
+            for index, item in enumerate(items)
+        ]
+        if timeout is None:
+            wait(futures)
+        else:
+            queue_deadline = time.monotonic() + timeout * math.ceil(len(items) / workers)
+            _wait_with_deadlines(futures, started, timeout, queue_deadline)
+
+        results = []
+        for item, future in zip(items, futures):
+            if future.done() and not future.cancelled():
+                results.append(future.result())
+            else:
+                future.cancel()
+                results.append(on_timeout(item) if on_timeout else None)
+        return results
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _wait_with_deadlines(futures, started, timeout, queue_deadline):
+    """Wait until every future is done or past its deadline.
+
+    A started future is due timeout after it started, one that has not
+    started yet at queue_deadline.
+    """
+    pending = dict(zip(futures, range(len(futures))))
+
+    def due(index):
+        return queue_deadline if started[index] is None else started[index] + timeout
+
+    while pending:
+        now = time.monotonic()
+        for future, index in list(pending.items()):
+            if now >= due(index):
+                # Left undone, so the caller gives up on it
+                del pending[future]
+        if not pending:
+            return
+
+        next_deadline = min(due(index) for index in pending.values())
+        done, _ = wait(pending, timeout=max(0.0, next_deadline - now), return_when=FIRST_COMPLETED)
+        for future in done:
+            del pending[future]
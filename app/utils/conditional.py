@@ -0,0 +1,45 @@
+from functools import wraps
+
+from flask import g, make_response, request
+
+
+def partial_response():
+    """Mark the response of the current request as partial.
+
+    A body that reports a failure of some part, e.g. a detail page that
+    timed out, is answered with 200 but must not be reused without
+    revalidation, so conditional() sends it with no-cache.
+    """
+    g.partial_response = True
+
+
+def conditional(max_age):
+    """Let clients revalidate a view's successful responses.
+
+    A 200 response gets a strong ETag, a hash of its JSON body, and
+    `Cache-Control: private, max-age=<max_age>`, or `private, no-cache`
+    when the view called partial_response(). A request whose
+    If-None-Match matches the ETag is answered with an empty 304. The
+    page is still fetched and parsed, but the body is not sent again.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            response = make_response(func(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            response.add_etag()
+            response.cache_control.private = True
+            if g.pop("partial_response", False):
+                response.cache_control.no_cache = True
+            else:
+                response.cache_control.max_age = max_age
+            # The body belongs to the session in the Authorization header
+            response.vary.add("Authorization")
+            return response.make_conditional(request)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,50 @@
+from bs4 import BeautifulSoup, SoupStrainer
+
+from app.utils.timing import timed
+from config import Config
+
+try:
+    import lxml  # noqa: F401
+
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+
+# Tags each scraped page needs. Only these elements (and everything inside
+# them) are built into the tree. Expired sessions are detected before
+# parsing (upstream.is_login_page), so "title" is not needed.
+PAGE_TAGS = {
+    "profile": ["th", "td"],
+    "results": ["h5", "table"],
+    "attendance": ["table"],
+    "attendance_calendar": ["select", "table"],
+    "exam_list": ["div"],
+    "exam_detail": ["table", "td"],
+}
+
+_strainers = {
+    page: SoupStrainer(tags) for page, tags in PAGE_TAGS.items()
+}
+
+
+def parser_backend():
+    """Name of the BeautifulSoup tree builder selected by Config.HTML_PARSER."""
+    backend = Config.HTML_PARSER
+    if backend == "auto":
+        return "lxml" if HAS_LXML else "html.parser"
+    return backend
+
+
+@timed("parse")
+def parse_html(markup, page=None):
+    """Build a soup of markup with the configured parser.
+
+    page names an entry of PAGE_TAGS; when given (and strainers are
+    enabled) the rest of the document is skipped while parsing. Pages that
+    need the full text, like the academic analysis, pass no page.
+    """
+    parse_only = None
+    if page is not None and Config.HTML_PARSER_STRAINERS:
+        parse_only = _strainers[page]
+    return BeautifulSoup(markup, parser_backend(), parse_only=parse_only)
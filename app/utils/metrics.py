@@ -0,0 +1,154 @@
+"""Prometheus metrics, served by /api/metrics.
+
+Under gunicorn every worker is its own process, so prometheus_client runs
+in multiprocess mode: each worker writes its samples to files in
+PROMETHEUS_MULTIPROC_DIR (set up by gunicorn_config.py) and a scrape merges
+the files of all workers. Without that variable, e.g. under `python run.py`,
+the metrics live in the process's default registry.
+"""
+
+import os
+import re
+import time
+from urllib.parse import urlsplit
+
+import requests
+from flask import request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from app.utils.timing import current_timer
+
+# Whole requests and upstream calls, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+# Phases within a request; parsing and serializing take milliseconds
+PHASE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+REQUESTS = Counter(
+    "etlab_api_requests_total", "API requests handled", ["endpoint", "method", "status"]
+)
+REQUEST_DURATION = Histogram(
+    "etlab_api_request_duration_seconds", "API request latency", ["endpoint"], buckets=LATENCY_BUCKETS
+)
+IN_FLIGHT = Gauge(
+    "etlab_api_requests_in_flight", "API requests being handled", multiprocess_mode="livesum"
+)
+PHASE_DURATION = Histogram(
+    "etlab_api_phase_duration_seconds",
+    "Time a request spent in each phase (upstream, parse, serialize)",
+    ["endpoint", "phase"],
+    buckets=PHASE_BUCKETS,
+)
+TOKEN_EXPIRED = Counter(
+    "etlab_api_token_expired_total", "Requests rejected because the ETLab session expired", ["endpoint"]
+)
+TOKEN_KNOWN_EXPIRED = Counter(
+    "etlab_api_token_known_expired_total",
+    "Requests answered with 401 without asking ETLab because the token is known to be expired",
+    ["endpoint"],
+)
+
+UPSTREAM_REQUESTS = Counter(
+    "etlab_api_upstream_requests_total", "Requests sent to ETLab", ["path", "outcome"]
+)
+UPSTREAM_DURATION = Histogram(
+    "etlab_api_upstream_request_duration_seconds", "ETLab response time", ["path"], buckets=LATENCY_BUCKETS
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "etlab_api_upstream_in_flight", "Requests to ETLab awaiting a response", multiprocess_mode="livesum"
+)
+UPSTREAM_POOL_SIZE = Gauge(
+    "etlab_api_upstream_pool_maxsize", "Pooled ETLab connections allowed", multiprocess_mode="livesum"
+)
+UPSTREAM_REJECTED = Counter(
+    "etlab_api_upstream_rejected_total", "Requests not sent to ETLab because it is failing", ["reason"]
+)
+CACHE_REQUESTS = Counter(
+    "etlab_api_upstream_cache_requests_total", "Lookups in the upstream page cache", ["tier", "result"]
+)
+COALESCED = Counter(
+    "etlab_api_coalesced_total",
+    "Calls that waited for an identical call already in flight instead of making their own",
+    ["layer"],
+)
+PREFETCH = Counter(
+    "etlab_api_prefetch_total", "Post-login cache warm-up jobs by outcome", ["outcome"]
+)
+
+_NUMERIC_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def upstream_path(url):
+    """ETLab path of url as a label: no query string, numeric segments as :n."""
+    return _NUMERIC_SEGMENT.sub("/:n", urlsplit(url).path) or "/"
+
+
+def render():
+    """Return (body, content type) of a scrape."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def init_app(app):
+    @app.before_request
+    def track_start():
+        IN_FLIGHT.inc()
+
+    @app.after_request
+    def track_response(response):
+        endpoint = request.endpoint or "unmatched"
+        status = response.status_code
+        REQUESTS.labels(endpoint, request.method, str(status)).inc()
+
+        timer = current_timer()
+        if timer is not None:
+            REQUEST_DURATION.labels(endpoint).observe(timer.elapsed())
+            for name, phase in timer.phases().items():
+                if phase["ms"]:
+                    PHASE_DURATION.labels(endpoint, name).observe(phase["ms"] / 1000)
+
+        # With a token present, a 401 means ETLab no longer accepts it
+        if status == 401 and "Authorization" in request.headers:
+            TOKEN_EXPIRED.labels(endpoint).inc()
+        return response
+
+    @app.teardown_request
+    def track_end(exc):
+        IN_FLIGHT.dec()
+
+
+class UpstreamCall:
+    """Track one request to ETLab: in-flight gauge, latency and outcome.
+
+    The caller sets outcome to the status class ("2xx") once a response
+    arrives; otherwise it is "timeout" or "error".
+    """
+
+    def __init__(self, url):
+        self.path = upstream_path(url)
+
+    def __enter__(self):
+        UPSTREAM_IN_FLIGHT.inc()
+        self.started = time.perf_counter()
+        self.outcome = "error"
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and issubclass(exc_type, requests.exceptions.Timeout):
+            self.outcome = "timeout"
+        UPSTREAM_IN_FLIGHT.dec()
+        UPSTREAM_DURATION.labels(self.path).observe(time.perf_counter() - self.started)
+        UPSTREAM_REQUESTS.labels(self.path, self.outcome).inc()
+        return False
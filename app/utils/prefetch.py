@@ -0,0 +1,178 @@
+"""Background warm-up of the cache after login.
+
+Right after logging in, a client asks for the profile, timetable and
+attendance. When Config.PREFETCH_ENABLED is set, /api/login queues those
+loads here so that the pages are already cached, or in flight and
+coalesced, when the requests arrive.
+
+Prefetching yields to interactive requests. It runs on a few threads of
+its own, waits while the worker is busy serving more than
+Config.PREFETCH_BUSY_REQUESTS requests, and drops the work when that lasts
+longer than Config.PREFETCH_MAX_DELAY. The queue is bounded; a full queue
+drops new jobs. Logging out cancels the pending steps of the token's job.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+
+from app.utils import metrics
+from app.utils.resilience import UpstreamUnavailable
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Interactive requests being served by this process
+_active = 0
+_active_lock = threading.Lock()
+
+
+class _Job:
+    def __init__(self, token, steps):
+        self.token = token
+        self.steps = steps
+        self.submitted = time.monotonic()
+        self.cancelled = threading.Event()
+
+
+class Prefetcher:
+    def __init__(self, workers, queue_size):
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._jobs = {}  # token -> _Job, queued or running
+        self._lock = threading.Lock()
+        self._counts_lock = threading.Lock()
+        self.counts = {"submitted": 0, "completed": 0, "dropped": 0, "cancelled": 0, "expired": 0, "failed": 0}
+        for index in range(workers):
+            threading.Thread(target=self._work, name=f"prefetch-{index}", daemon=True).start()
+
+    def submit(self, token, steps):
+        """Queue steps, functions of the token, to run in the background.
+
+        Returns False when the job was dropped because the queue is full.
+        """
+        job = _Job(token, steps)
+        with self._lock:
+            previous = self._jobs.get(token)
+            if previous is not None:
+                previous.cancelled.set()
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self._count("dropped")
+                return False
+            self._jobs[token] = job
+            self._count("submitted")
+        return True
+
+    def cancel(self, token):
+        with self._lock:
+            job = self._jobs.pop(token, None)
+        if job is not None:
+            job.cancelled.set()
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._run(job)
+            finally:
+                with self._lock:
+                    if self._jobs.get(job.token) is job:
+                        del self._jobs[job.token]
+
+    def _run(self, job):
+        for step in job.steps:
+            if not self._wait_until_idle(job):
+                return
+            try:
+                step(job.token)
+            except UpstreamUnavailable:
+                self._count("failed")
+                return
+            except Exception:
+                logger.warning("Prefetch step %s failed", getattr(step, "__name__", step), exc_info=True)
+                self._count("failed")
+                return
+        self._count("completed")
+
+    def _wait_until_idle(self, job):
+        """Wait for a quiet moment; False when the job should be abandoned."""
+        while True:
+            if job.cancelled.is_set():
+                self._count("cancelled")
+                return False
+            if time.monotonic() - job.submitted > Config.PREFETCH_MAX_DELAY:
+                self._count("expired")
+                return False
+            if active_requests() <= Config.PREFETCH_BUSY_REQUESTS:
+                return True
+            job.cancelled.wait(0.05)
+
+    def _count(self, outcome):
+        with self._counts_lock:
+            self.counts[outcome] += 1
+        metrics.PREFETCH.labels(outcome).inc()
+
+    def stats(self):
+        with self._counts_lock:
+            counts = dict(self.counts)
+        return {**counts, "queued": self._queue.qsize(), "jobs": len(self._jobs)}
+
+
+def active_requests():
+    return _active
+
+
+def init_app(app):
+    @app.before_request
+    def count_start():
+        global _active
+        with _active_lock:
+            _active += 1
+
+    @app.teardown_request
+    def count_end(exc):
+        global _active
+        with _active_lock:
+            _active -= 1
+
+
+_prefetcher = None
+_prefetcher_pid = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_prefetcher():
+    """Return the prefetcher of the current process, started on first use.
+
+    Threads do not survive a fork, so like the upstream client it is
+    rebuilt in every gunicorn worker.
+    """
+    global _prefetcher, _prefetcher_pid
+
+    pid = os.getpid()
+    if _prefetcher is None or _prefetcher_pid != pid:
+        with _prefetcher_lock:
+            if _prefetcher is None or _prefetcher_pid != pid:
+                _prefetcher = Prefetcher(Config.PREFETCH_WORKERS, Config.PREFETCH_QUEUE_SIZE)
+                _prefetcher_pid = pid
+    return _prefetcher
+
+
+def submit(token, steps):
+    if not Config.PREFETCH_ENABLED:
+        return False
+    return get_prefetcher().submit(token, steps)
+
+
+def cancel(token):
+    if _prefetcher is not None and _prefetcher_pid == os.getpid():
+        _prefetcher.cancel(token)
+
+
+def stats():
+    if _prefetcher is None or _prefetcher_pid != os.getpid():
+        return None
+    return _prefetcher.stats()
@@ -0,0 +1,99 @@
+"""Structured request logging and the Server-Timing header.
+
+Records are JSON lines on stderr under the "app" logger. A request is
+logged at ERROR when it failed with a 5xx, at WARNING when it took longer
+than Config.LOG_SLOW_REQUEST_MS, and otherwise at INFO for a random
+Config.LOG_SAMPLE_RATE share of requests, so a busy worker does not spend
+its time writing logs.
+"""
+
+import json
+import logging
+import random
+from datetime import datetime, timezone
+
+from flask import request
+
+from app.utils.timing import current_timer, end_request, start_request
+from config import Config
+
+logger = logging.getLogger("app.requests")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; extra={"fields": {...}} adds keys to it."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging():
+    """Send the app's loggers to stderr as JSON at Config.LOG_LEVEL."""
+    app_logger = logging.getLogger("app")
+    app_logger.setLevel(Config.LOG_LEVEL.upper())
+    if not app_logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(JsonFormatter())
+        app_logger.addHandler(handler)
+        app_logger.propagate = False
+
+
+def log_request(status, timer):
+    duration_ms = timer.elapsed() * 1000
+    if status >= 500:
+        level = logging.ERROR
+    elif duration_ms >= Config.LOG_SLOW_REQUEST_MS:
+        level = logging.WARNING
+    elif random.random() < Config.LOG_SAMPLE_RATE:
+        level = logging.INFO
+    else:
+        return
+    if not logger.isEnabledFor(level):
+        return
+
+    logger.log(
+        level,
+        "request",
+        extra={
+            "fields": {
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": status,
+                "duration_ms": round(duration_ms, 1),
+                "phases": timer.phases(),
+                "sampled": level == logging.INFO,
+            }
+        },
+    )
+
+
+def init_app(app):
+    configure_logging()
+
+    @app.before_request
+    def start_timer():
+        start_request()
+
+    @app.after_request
+    def report_timings(response):
+        timer = current_timer()
+        if timer is None:
+            return response
+        if Config.SERVER_TIMING:
+            response.headers["Server-Timing"] = timer.server_timing()
+        log_request(response.status_code, timer)
+        return response
+
+    @app.teardown_request
+    def stop_timer(exc):
+        end_request()
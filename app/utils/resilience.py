@@ -0,0 +1,118 @@
+import math
+import random
+import threading
+import time
+
+
+class UpstreamUnavailable(Exception):
+    """ETLab is known to be failing; the request was not sent."""
+
+    def __init__(self, retry_after, reason="ETLab is temporarily unavailable"):
+        super().__init__(reason)
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+        self.reason = reason
+
+
+class UpstreamError(UpstreamUnavailable):
+    """ETLab answered with a server error, on the last retry as well."""
+
+    def __init__(self, status_code, retry_after):
+        super().__init__(retry_after, f"ETLab failed to answer the request (HTTP {status_code})")
+        self.status_code = status_code
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After failure_threshold failures in a row the breaker opens and every
+    call is refused for reset_timeout seconds. Then a single probe is let
+    through: success closes the breaker, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.times_opened = 0
+
+    def allow(self):
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self.times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def retry_after(self):
+        with self._lock:
+            if self._state != self.OPEN:
+                return 1
+            return self.reset_timeout - (time.monotonic() - self._opened_at)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "times_opened": self.times_opened,
+            }
+
+
+class RetryBudget:
+    """Token bucket that caps retries to a fraction of the request volume.
+
+    Every request deposits ratio tokens, every retry spends one, so a
+    failing upstream sees at most about (1 + ratio) times the normal load.
+    """
+
+    def __init__(self, ratio, max_tokens):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = float(max_tokens)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+def backoff_delay(attempt, base, cap):
+    """Full-jitter exponential backoff for the given retry number (0 based)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
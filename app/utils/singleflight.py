@@ -0,0 +1,82 @@
+"""Coalescing of identical concurrent calls.
+
+When two requests need the same thing at the same time, e.g. /present and
+/absent for the same month or a dashboard open in two tabs, only the first
+caller does the work. The others wait for it and get the same result, or
+the same exception. Results are shared objects, so callers must not modify
+them.
+"""
+
+import functools
+import threading
+
+from app.utils import metrics
+from app.utils.timing import record
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key, func):
+        """Return func(), sharing one call among concurrent callers with the same key."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            metrics.COALESCED.labels(self.name).inc()
+            record("coalesced")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._calls), "calls": self.calls, "coalesced": self.coalesced}
+
+
+_loaders = SingleFlight("loader")
+
+
+def coalesced(func):
+    """Share concurrent calls of func with equal arguments (which must be hashable)."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+        return _loaders.do(key, lambda: func(*args, **kwargs))
+
+    return wrapper
+
+
+def loader_stats():
+    return _loaders.stats()
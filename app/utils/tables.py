@@ -0,0 +1,124 @@
+"""Declarative extraction of the tables on scraped ETLab pages.
+
+A page section is described by a TableSpec: the words its heading must
+contain and how to turn each row's cells into a record. extract_sections()
+finds the tables of all specs in a single pass over the document and reads
+them with the same row loop.
+"""
+
+
+class TableSpec:
+    """A table introduced by a heading, e.g. "Sessional Exams" on the results page.
+
+    heading is a tuple of lowercase words that must all appear in the
+    heading text. columns maps each output key to either a cell index or a
+    function of the row's cell texts. Rows with fewer than min_cells cells,
+    or for which skip(texts) is true, are left out.
+    """
+
+    def __init__(self, name, heading, columns, min_cells=None, skip=None, header_rows=1):
+        self.name = name
+        self.heading = heading
+        self.columns = columns
+        if min_cells is None:
+            min_cells = 1 + max((index for index in columns.values() if isinstance(index, int)), default=0)
+        self.min_cells = min_cells
+        self.skip = skip
+        self.header_rows = header_rows
+        # (key, getter) pairs, resolved once rather than per cell
+        self._getters = [
+            (key, (lambda texts, index=column: texts[index]) if isinstance(column, int) else column)
+            for key, column in columns.items()
+        ]
+
+    def matches(self, heading_text):
+        if not heading_text:
+            return False
+        heading_text = heading_text.lower()
+        return all(word in heading_text for word in self.heading)
+
+    def read(self, table):
+        """Records of the rows of table, after its header rows."""
+        records = []
+        for row in descendants_named(table, "tr")[self.header_rows:]:
+            texts = cell_texts(descendants_named(row, "td"))
+            if len(texts) < self.min_cells or (self.skip and self.skip(texts)):
+                continue
+            records.append({key: getter(texts) for key, getter in self._getters})
+        return records
+
+
+def descendants_named(tag, name):
+    """Same as tag.find_all(name), by a plain walk that is cheaper per element."""
+    return [element for element in tag.descendants if element.name == name]
+
+
+def cell_texts(cells, strip=True):
+    """Text of each cell, stripped of surrounding whitespace by default."""
+    if strip:
+        return [cell.get_text().strip() for cell in cells]
+    return [cell.get_text() for cell in cells]
+
+
+def find_sections(soup, specs, heading_tag="h5"):
+    """
+    Map each spec name to the first table after the first heading that
+    matches it, or None. Headings and tables are visited once, in document
+    order, however many specs there are.
+    """
+    tables = {spec.name: None for spec in specs}
+    unmatched = list(specs)
+    waiting = []  # specs whose heading was seen, waiting for the next table
+
+    # A plain walk, as in descendants_named()
+    for element in soup.descendants:
+        if element.name == heading_tag:
+            text = element.string
+            for spec in list(unmatched):
+                if spec.matches(text):
+                    unmatched.remove(spec)
+                    waiting.append(spec)
+        elif element.name == "table":
+            for spec in waiting:
+                tables[spec.name] = element
+            waiting = []
+            if not unmatched:
+                break
+
+    return tables
+
+
+def extract_sections(soup, specs, heading_tag="h5"):
+    """Map each spec name to the records of its table ([] when it has none)."""
+    tables = find_sections(soup, specs, heading_tag)
+    return {
+        spec.name: spec.read(tables[spec.name]) if tables[spec.name] is not None else []
+        for spec in specs
+    }
+
+
+def find_labelled_cells(soup, labels, tag="td"):
+    """
+    Map each label to the first cell whose text contains it, in one pass
+    over the cells. Used for the "Label | Value" tables of detail pages.
+    """
+    found = {}
+    for cell in soup.find_all(tag):
+        text = cell.string
+        if not text:
+            continue
+        for label in labels:
+            if label not in found and label in text:
+                found[label] = cell
+        if len(found) == len(labels):
+            break
+    return found
+
+
+def find_table_with_header(soup, header):
+    """The first table with a <th> whose text contains header, or None."""
+    for th in soup.find_all("th"):
+        if th.string and header in th.string:
+            # The outermost table around it is the first one in document order
+            return th.find_parents("table")[-1]
+    return None
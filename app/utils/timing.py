@@ -0,0 +1,109 @@
+"""Per-request phase timings.
+
+Each request gets a RequestTimer (see app.utils.request_log). Code wraps
+the work it does in phase("upstream"), phase("parse") and so on, and the
+time is added to the timer of the request it runs for. The timer lives in a
+context variable, so threads started through bounded_map() report to the
+request that started them. Their durations are summed, so a phase can
+exceed the wall time of the request.
+"""
+
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+_timer = contextvars.ContextVar("request_timer", default=None)
+# Phases open in the current context, so nested calls are not counted twice
+_open_phases = contextvars.ContextVar("open_phases", default=frozenset())
+
+
+class RequestTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._phases = {}  # name -> [seconds, count]
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds=0.0):
+        with self._lock:
+            entry = self._phases.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def phases(self):
+        """{name: {"ms": total milliseconds, "count": times entered}}"""
+        with self._lock:
+            return {
+                name: {"ms": round(seconds * 1000, 1), "count": count}
+                for name, (seconds, count) in self._phases.items()
+            }
+
+    def server_timing(self):
+        """Value of the Server-Timing response header."""
+        metrics = []
+        for name, phase in self.phases().items():
+            metric = f"{name};dur={phase['ms']}"
+            if phase["count"] > 1:
+                metric += f';desc="{phase["count"]}x"'
+            metrics.append(metric)
+        metrics.append(f"total;dur={round(self.elapsed() * 1000, 1)}")
+        return ", ".join(metrics)
+
+
+def start_request():
+    """Give the current context a fresh timer and return it."""
+    timer = RequestTimer()
+    _timer.set(timer)
+    _open_phases.set(frozenset())
+    return timer
+
+
+def end_request():
+    _timer.set(None)
+
+
+def current_timer():
+    return _timer.get()
+
+
+def record(name, seconds=0.0):
+    """Add an already measured (or zero length) phase, e.g. a cache hit."""
+    timer = _timer.get()
+    if timer is not None:
+        timer.add(name, seconds)
+
+
+@contextmanager
+def phase(name):
+    """Time the enclosed block as part of phase name of the current request."""
+    timer = _timer.get()
+    open_phases = _open_phases.get()
+    if timer is None or name in open_phases:
+        yield
+        return
+
+    token = _open_phases.set(open_phases | {name})
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+        _open_phases.reset(token)
+
+
+def timed(name):
+    """Decorator form of phase()."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
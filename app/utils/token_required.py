@@ -1,13 +1,32 @@
 from functools import wraps
 from flask import request, jsonify
 
+from app.utils import metrics, upstream
+
+
+def get_token():
+    """Return the ETLab session token from the Authorization header.
+
+    Accepts both "Bearer <token>" and the bare token.
+    """
+    auth_header = request.headers.get("Authorization", "")
+    if auth_header.startswith("Bearer "):
+        return auth_header.split(" ")[1]
+    return auth_header
+
 
 def require_token_auth(func):
+    """Answer 401 when there is no token, or when ETLab already turned it down."""
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        if "Authorization" in request.headers:
-            return func(*args, **kwargs)
+        if "Authorization" not in request.headers:
+            return jsonify({"message": "Token is required"}), 401
+
+        if upstream.token_expired(get_token()):
+            metrics.TOKEN_KNOWN_EXPIRED.labels(request.endpoint).inc()
+            return jsonify({"message": "Token expired. Please login again."}), 401
 
-        return jsonify({"message": "Token is required"}), 401
+        return func(*args, **kwargs)
 
     return wrapper
@@ -0,0 +1,54 @@
+"""Which ETLab session tokens are known to be expired.
+
+ETLab answers a request made with an expired session with its login page,
+and a session never comes back once it has expired. The upstream client
+marks such a token expired for Config.TOKEN_EXPIRED_TTL, and
+require_token_auth answers it with 401 without asking ETLab.
+
+Marks are kept in their own backend, Config.TOKEN_STATE_BACKEND, a SQLite
+file by default, so that every worker of a host learns about an expired
+token, or a logout, at once.
+"""
+
+from app.utils.cache import TTLCache
+from app.utils.cache_backends import token_prefix
+
+EXPIRED = b"expired"
+
+
+class TokenStates:
+    def __init__(self, backend, expired_ttl):
+        self.backend = backend
+        self.expired_ttl = expired_ttl
+        # Tokens this process already knows to be expired, answered
+        # without a backend lookup
+        self._expired = TTLCache(4 * 1024 * 1024)
+
+    @property
+    def shared(self):
+        """Whether other worker processes see the marks of this one."""
+        return self.backend.name != "memory"
+
+    @staticmethod
+    def _key(token):
+        return token_prefix(token) + "expired"
+
+    def is_expired(self, token):
+        if self.expired_ttl <= 0:
+            return False
+        key = self._key(token)
+        if self._expired.get(key) is not None:
+            return True
+        if self.backend.get(key) != EXPIRED:
+            return False
+        self._expired.set(key, True, self.expired_ttl, len(key) + 64)
+        return True
+
+    def mark_expired(self, token):
+        """Mark token expired; False when it already was."""
+        if self.expired_ttl <= 0 or self.is_expired(token):
+            return False
+        key = self._key(token)
+        self.backend.set(key, EXPIRED, self.expired_ttl)
+        self._expired.set(key, True, self.expired_ttl, len(key) + 64)
+        return True
@@ -0,0 +1,492 @@
+import html
+import os
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from flask import has_request_context, request as flask_request
+from requests.adapters import HTTPAdapter
+from requests.cookies import RequestsCookieJar
+
+from app.utils import metrics
+from app.utils.cache import CachedResponse, TTLCache
+from app.utils.cache_backends import EntryCodec, MemoryBackend, create_backend, store_key, token_prefix
+from app.utils.cache_policy import IMMUTABLE, IMMUTABLE_RULES, VOLATILE, CachePolicy, longest_prefix
+from app.utils.resilience import CircuitBreaker, RetryBudget, UpstreamError, UpstreamUnavailable, backoff_delay
+from app.utils.singleflight import SingleFlight
+from app.utils.timing import phase, record
+from app.utils.token_state import TokenStates
+from config import Config
+
+
+class _NoCookieJar(RequestsCookieJar):
+    """Cookie jar that never stores anything.
+
+    The pooled session is shared by every request in the worker, so any
+    cookie it remembered would be sent on behalf of the next user.
+    """
+
+    def set_cookie(self, cookie, *args, **kwargs):
+        return None
+
+
+class UpstreamClient:
+    """Keep-alive HTTP client for the ETLab portal.
+
+    One instance is shared by all blueprints of a worker process. The
+    session token is injected per request, never stored on the session.
+    Successful responses are cached as cache_policy decides, keyed by
+    token, method, URL and form payload and stored through cache_codec:
+    volatile pages in cache_backend (by default in this process), pages
+    that can no longer change in immutable_cache. Tokens whose session
+    expired are marked in token_states.
+
+    Every call gets a connect/read timeout, idempotent GETs are retried
+    with backoff within a retry budget, and a circuit breaker refuses calls
+    with UpstreamUnavailable while ETLab keeps failing. A server error that
+    outlives the retries raises UpstreamError.
+    """
+
+    def __init__(self, base_url, pool_connections, pool_maxsize, pool_block,
+                 cache_ttls=None, cache_max_bytes=0, timeouts=None,
+                 default_timeout=None, retries=0, retry_backoff=0.2,
+                 retry_backoff_cap=2.0, retry_budget=None, breaker=None,
+                 error_ttl=0, cache_backend=None, cache_codec=None,
+                 cache_policy=None, immutable_cache=None, token_states=None):
+        self.base_url = base_url.rstrip("/")
+        self.pool_maxsize = pool_maxsize
+        self.policy = cache_policy or CachePolicy(cache_ttls or {})
+        self.cache = cache_backend or MemoryBackend(cache_max_bytes)
+        self.caches = {VOLATILE: self.cache, IMMUTABLE: immutable_cache or self.cache}
+        self.codec = cache_codec or EntryCodec(compression=0)
+        self.token_states = token_states or TokenStates(MemoryBackend(0), expired_ttl=0)
+
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_cap = retry_backoff_cap
+        self.retry_budget = retry_budget or RetryBudget(ratio=0.0, max_tokens=0)
+        self.breaker = breaker or CircuitBreaker(failure_threshold=5, reset_timeout=30)
+        self.error_ttl = error_ttl
+        self.recent_errors = TTLCache(1024 * 1024)
+        self.flights = SingleFlight("upstream")
+
+        self._session = requests.Session()
+        self._session.cookies = _NoCookieJar()
+        self._session.headers.update({"User-Agent": Config.USER_AGENT})
+
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self._session.mount("https://", self._adapter)
+        self._session.mount("http://", self._adapter)
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+        self._in_flight = 0
+        metrics.UPSTREAM_POOL_SIZE.set(pool_maxsize)
+
+    def url_for(self, path):
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}{path}"
+
+    def timeout_for(self, url):
+        return longest_prefix(self.timeouts, url, self.default_timeout)
+
+    def request(self, method, path, token=None, **kwargs):
+        url = self.url_for(path)
+        if token is None:
+            return self._fetch(method, url, token, **kwargs)
+
+        key = cache_key(token, method, url, kwargs.get("data"))
+        decision = self.policy.classify(method, url, kwargs.get("data"))
+        if decision.ttl > 0:
+            if cache_bypassed():
+                metrics.CACHE_REQUESTS.labels(decision.tier, "bypass").inc()
+            else:
+                cached = self._lookup(key, decision)
+                if cached is not None:
+                    return cached
+                metrics.CACHE_REQUESTS.labels(decision.tier, "miss").inc()
+
+        # Requests made with a session token only read from ETLab, so
+        # identical ones in flight at the same time share one fetch
+        return self.flights.do(key, lambda: self._fetch_and_store(method, url, token, key, decision, **kwargs))
+
+    def _lookup(self, key, decision):
+        # An immutable request whose response failed its rule's check was
+        # stored as volatile, so that tier is tried as well
+        tiers = (IMMUTABLE, VOLATILE) if decision.tier == IMMUTABLE else (VOLATILE,)
+        started = time.perf_counter()
+        for tier in tiers:
+            data = self.caches[tier].get(store_key(key))
+            cached = self.codec.decode(data) if data is not None else None
+            if cached is not None:
+                record("cache_hit", time.perf_counter() - started)
+                metrics.CACHE_REQUESTS.labels(tier, "hit").inc()
+                return cached
+        return None
+
+    def _fetch_and_store(self, method, url, token, key, decision, **kwargs):
+        response = self._fetch(method, url, token, **kwargs)
+        session_expired = self._note_session(token, response)
+        if decision.ttl <= 0 or response.status_code != 200 or session_expired:
+            return response
+
+        tier, ttl = decision.tier, decision.ttl
+        if tier == IMMUTABLE and not decision.rule.accepts(response):
+            tier, ttl = VOLATILE, self.policy.volatile_ttl(url)
+        if ttl > 0:
+            cached = CachedResponse.from_response(response)
+            self.caches[tier].set(store_key(key), self.codec.encode(cached), ttl)
+        return response
+
+    def _note_session(self, token, response):
+        """Mark token expired when response is the login page; True if so."""
+        if not is_login_page(response):
+            return False
+        if self.token_states.mark_expired(token):
+            # The pages of a dead session can never be served again
+            self.forget_token(token)
+        return True
+
+    def forget_token(self, token):
+        """Drop every cached page fetched with token, in every tier.
+
+        Caches registered with register_token_cache() forget it as well.
+        """
+        for cache in {id(cache): cache for cache in self.caches.values()}.values():
+            cache.discard_prefix(token_prefix(token))
+        for forget in _token_caches:
+            forget(token)
+
+    def _fetch(self, method, url, token, budget=None, **kwargs):
+        """Send with timeouts, retries and the circuit breaker applied.
+
+        budget, in seconds, bounds the whole call, retries and their
+        backoff included; each attempt's timeout is cut to what is left.
+        """
+        error_key = None
+        if token is not None and self.error_ttl > 0:
+            error_key = cache_key(token, method, url, kwargs.get("data"))
+            if self.recent_errors.get(error_key) is not None:
+                metrics.UPSTREAM_REJECTED.labels("recent_error").inc()
+                raise UpstreamUnavailable(self.error_ttl, "ETLab failed this request moments ago")
+
+        if not self.breaker.allow():
+            metrics.UPSTREAM_REJECTED.labels("circuit_open").inc()
+            raise UpstreamUnavailable(self.breaker.retry_after())
+
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout_for(url)
+
+        deadline = time.monotonic() + budget if budget is not None else None
+        attempts = 1 + (self.retries if method.upper() == "GET" else 0)
+        self.retry_budget.deposit()
+        for attempt in range(attempts):
+            last_attempt = attempt + 1 == attempts
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._remember_error(error_key)
+                    raise requests.exceptions.Timeout(f"No time left to request {url}")
+                kwargs["timeout"] = _cap_timeout(kwargs["timeout"], remaining)
+            try:
+                response = self._send(method, url, token, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self.breaker.record_failure()
+                if not last_attempt and self._may_retry(attempt, deadline):
+                    continue
+                self._remember_error(error_key)
+                raise
+            except requests.exceptions.RequestException:
+                # ETLab answered (e.g. a redirect loop), so it is not down
+                self.breaker.record_success()
+                raise
+
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+                if not last_attempt and self._may_retry(attempt, deadline):
+                    continue
+                self._remember_error(error_key)
+                # Never hand an error page to a parser
+                raise UpstreamError(response.status_code, self.error_ttl)
+
+            self.breaker.record_success()
+            return response
+
+    def _may_retry(self, attempt, deadline=None):
+        delay = backoff_delay(attempt, self.retry_backoff, self.retry_backoff_cap)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return False
+        if not self.retry_budget.withdraw() or not self.breaker.allow():
+            return False
+        time.sleep(delay)
+        return True
+
+    def _remember_error(self, error_key):
+        if error_key is not None:
+            self.recent_errors.set(error_key, True, self.error_ttl, 1)
+
+    def _send(self, method, url, token, **kwargs):
+        if token is not None:
+            cookies = dict(kwargs.pop("cookies", None) or {})
+            cookies[Config.COOKIE_KEY] = token
+            kwargs["cookies"] = cookies
+
+        with self._lock:
+            self._requests += 1
+            self._in_flight += 1
+        try:
+            with metrics.UpstreamCall(url) as call, phase("upstream"):
+                response = self._session.request(method, url, **kwargs)
+                call.outcome = f"{response.status_code // 100}xx"
+                return response
+        except requests.exceptions.RequestException:
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def get(self, path, token=None, **kwargs):
+        return self.request("GET", path, token=token, **kwargs)
+
+    def post(self, path, token=None, **kwargs):
+        return self.request("POST", path, token=token, **kwargs)
+
+    def login(self, username, password):
+        """Submit the ETLab login form.
+
+        Returns the final response and the cookies ETLab set along the
+        redirect chain. The cookies live only in a jar local to this call,
+        so concurrent logins on the shared pool never see each other's
+        session ids.
+        """
+        payload = {
+            "LoginForm[username]": username,
+            "LoginForm[password]": password,
+            "yt0": "",
+        }
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+        response = self.post("/user/login", data=payload, headers=headers)
+
+        jar = RequestsCookieJar()
+        for hop in response.history + [response]:
+            jar.update(hop.cookies)
+        return response, jar.get_dict()
+
+    def stats(self):
+        pools = []
+        manager = self._adapter.poolmanager
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            idle = sum(1 for conn in list(pool.pool.queue) if conn is not None)
+            pools.append(
+                {
+                    "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                    "maxsize": pool.pool.maxsize,
+                    "connections_opened": pool.num_connections,
+                    "requests_sent": pool.num_requests,
+                    "idle_connections": idle,
+                }
+            )
+
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "pool_maxsize": self.pool_maxsize,
+                "requests": self._requests,
+                "errors": self._errors,
+                "in_flight": self._in_flight,
+                "breaker": self.breaker.stats(),
+                "coalescing": self.flights.stats(),
+                "pools": pools,
+            }
+
+
+def cache_key(token, method, url, data=None):
+    payload = tuple(sorted((str(k), str(v)) for k, v in (data or {}).items()))
+    return (token, method.upper(), url, payload)
+
+
+def cache_bypassed():
+    """Whether the API client asked for fresh data with Cache-Control: no-cache."""
+    if not has_request_context():
+        return False
+    cache_control = flask_request.headers.get("Cache-Control", "").lower()
+    return "no-cache" in cache_control or "no-store" in cache_control
+
+
+def is_login_url(url):
+    return "/user/login" in urlsplit(url).path
+
+
+_TITLE = re.compile(r"<title[^>]*>(.*?)</title", re.IGNORECASE | re.DOTALL)
+
+
+def is_login_page(response):
+    """Whether ETLab answered with its login page: the session is not valid.
+
+    Decided without parsing the page: either the redirects ended on the
+    login URL, or the <title> within the first Config.LOGIN_SCAN_BYTES of
+    the page mentions login.
+    """
+    if is_login_url(response.url):
+        return True
+    match = _TITLE.search(_page_start(response, Config.LOGIN_SCAN_BYTES))
+    return match is not None and "login" in html.unescape(match.group(1)).lower()
+
+
+def _page_start(response, size):
+    if isinstance(response, CachedResponse):
+        return response.text[:size]
+    # Decode only the bytes that are scanned, not the whole page
+    return response.content[:size].decode("utf-8", "replace")
+
+
+def _cap_timeout(timeout, remaining):
+    """Cut a requests timeout, a number or a (connect, read) pair, to remaining."""
+    if isinstance(timeout, tuple):
+        return tuple(remaining if part is None else min(part, remaining) for part in timeout)
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def _cache_policy():
+    if not Config.UPSTREAM_CACHE_ENABLED:
+        return CachePolicy({})
+    return CachePolicy(Config.UPSTREAM_CACHE_TTLS, Config.UPSTREAM_IMMUTABLE_TTL, IMMUTABLE_RULES)
+
+
+# forget(token) functions of caches outside the client, e.g. parsed timetables
+_token_caches = []
+
+
+def register_token_cache(forget):
+    """Have forget_token(), on logout or once a session expired, call forget(token)."""
+    _token_caches.append(forget)
+
+
+def _immutable_cache(policy):
+    """Backend of the immutable tier, or None when nothing is immutable."""
+    if not policy.rules:
+        return None
+    return create_backend(
+        Config.UPSTREAM_IMMUTABLE_CACHE_BACKEND,
+        max_bytes=Config.UPSTREAM_IMMUTABLE_CACHE_MAX_BYTES,
+        sqlite_path=Config.UPSTREAM_IMMUTABLE_CACHE_PATH,
+        redis_url=Config.UPSTREAM_CACHE_REDIS_URL,
+        namespace="etlab-api:immutable:",
+    )
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the client of the current process.
+
+    Gunicorn forks workers after the app may have been imported, so the
+    client is keyed on the pid and rebuilt instead of sharing sockets
+    with the parent.
+    """
+    global _client, _client_pid
+
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                policy = _cache_policy()
+                _client = UpstreamClient(
+                    Config.BASE_URL,
+                    pool_connections=Config.UPSTREAM_POOL_CONNECTIONS,
+                    pool_maxsize=Config.UPSTREAM_POOL_MAXSIZE,
+                    pool_block=Config.UPSTREAM_POOL_BLOCK,
+                    cache_max_bytes=Config.UPSTREAM_CACHE_MAX_BYTES,
+                    timeouts=Config.UPSTREAM_TIMEOUTS,
+                    default_timeout=Config.UPSTREAM_TIMEOUT,
+                    retries=Config.UPSTREAM_RETRIES,
+                    retry_backoff=Config.UPSTREAM_RETRY_BACKOFF,
+                    retry_budget=RetryBudget(
+                        ratio=Config.UPSTREAM_RETRY_BUDGET_RATIO,
+                        max_tokens=Config.UPSTREAM_RETRY_BUDGET_MAX,
+                    ),
+                    breaker=CircuitBreaker(
+                        failure_threshold=Config.UPSTREAM_BREAKER_FAILURES,
+                        reset_timeout=Config.UPSTREAM_BREAKER_RESET,
+                    ),
+                    error_ttl=Config.UPSTREAM_ERROR_CACHE_TTL,
+                    cache_backend=create_backend(
+                        Config.UPSTREAM_CACHE_BACKEND,
+                        max_bytes=Config.UPSTREAM_CACHE_MAX_BYTES,
+                        sqlite_path=Config.UPSTREAM_CACHE_SQLITE_PATH,
+                        redis_url=Config.UPSTREAM_CACHE_REDIS_URL,
+                    ),
+                    cache_codec=EntryCodec(
+                        compression=Config.UPSTREAM_CACHE_COMPRESSION,
+                        encryption_key=Config.UPSTREAM_CACHE_ENCRYPTION_KEY,
+                    ),
+                    cache_policy=policy,
+                    immutable_cache=_immutable_cache(policy),
+                    token_states=TokenStates(
+                        create_backend(
+                            Config.TOKEN_STATE_BACKEND,
+                            max_bytes=Config.TOKEN_STATE_MAX_BYTES,
+                            sqlite_path=Config.TOKEN_STATE_SQLITE_PATH,
+                            redis_url=Config.UPSTREAM_CACHE_REDIS_URL,
+                            namespace="etlab-api:token:",
+                        ),
+                        expired_ttl=Config.TOKEN_EXPIRED_TTL,
+                    ),
+                )
+                _client_pid = pid
+    return _client
+
+
+def get(path, token=None, **kwargs):
+    return get_client().get(path, token=token, **kwargs)
+
+
+def post(path, token=None, **kwargs):
+    return get_client().post(path, token=token, **kwargs)
+
+
+def login(username, password):
+    return get_client().login(username, password)
+
+
+def forget_token(token):
+    get_client().forget_token(token)
+
+
+def token_states_shared():
+    """Whether an expired token seen by one worker is known to the others."""
+    return get_client().token_states.shared
+
+
+def token_expired(token):
+    """Whether ETLab already turned token down; see app/utils/token_state.py."""
+    return get_client().token_states.is_expired(token)
+
+
+def pool_stats():
+    return get_client().stats()
+
+
+def cache_stats():
+    client = get_client()
+    # Without an immutable tier both names refer to the volatile backend
+    return {tier: cache.stats() for tier, cache in client.caches.items() if tier == VOLATILE or cache is not client.cache}
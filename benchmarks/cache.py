@@ -0,0 +1,120 @@
+"""Upstream cache backend benchmarks.
+
+Stores the fixture pages of benchmarks/fixtures.py in every cache backend
+with every entry codec and reports the time to store and to load (and
+decode) one page, and the bytes stored per page. The redis backend runs
+against loadtest/redis_stub.py unless --redis-url names a real server.
+
+    python -m benchmarks.cache
+    python -m benchmarks.cache -k sqlite
+    python -m benchmarks.cache --redis-url redis://127.0.0.1:6379/15
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.cache import CachedResponse  # noqa: E402
+from app.utils.cache_backends import (  # noqa: E402
+    HAS_CRYPTOGRAPHY,
+    EntryCodec,
+    MemoryBackend,
+    RedisBackend,
+    SQLiteBackend,
+    store_key,
+)
+from benchmarks import fixtures  # noqa: E402
+from loadtest.redis_stub import create_server  # noqa: E402
+
+PAGES = {
+    "profile": fixtures.profile_page,
+    "results": lambda: fixtures.results_page(6),
+    "academic_analysis": lambda: fixtures.academic_analysis_page(6),
+    "attendance_calendar": fixtures.attendance_calendar_page,
+}
+
+
+def codecs():
+    found = {"plain": EntryCodec(compression=0), "zlib1": EntryCodec(compression=1), "zlib6": EntryCodec(compression=6)}
+    if HAS_CRYPTOGRAPHY:
+        from cryptography.fernet import Fernet
+
+        found["zlib1+fernet"] = EntryCodec(compression=1, encryption_key=Fernet.generate_key())
+    return found
+
+
+def measure(backend, codec, responses, repeat):
+    """Median microseconds of set and get, and mean stored bytes per page."""
+    sets, gets, sizes = [], [], []
+    for run in range(repeat):
+        for name, response in responses.items():
+            key = store_key((f"token-{run}", "GET", response.url, ()))
+
+            t0 = time.perf_counter()
+            data = codec.encode(response)
+            backend.set(key, data, 60)
+            sets.append(time.perf_counter() - t0)
+            sizes.append(len(data))
+
+            t0 = time.perf_counter()
+            loaded = codec.decode(backend.get(key))
+            gets.append(time.perf_counter() - t0)
+            assert loaded.text == response.text, f"{name} did not survive the round trip"
+
+    return {
+        "set_us": round(statistics.median(sets) * 1e6, 1),
+        "get_us": round(statistics.median(gets) * 1e6, 1),
+        "stored_bytes": round(statistics.mean(sizes)),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="pattern", help="only run cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=200, help="round trips per page and case")
+    parser.add_argument("--redis-url", help="benchmark a real server instead of the stand-in")
+    args = parser.parse_args(argv)
+
+    responses = {
+        name: CachedResponse(200, f"https://etlab.example/{name}", build(), {"Content-Type": "text/html"})
+        for name, build in PAGES.items()
+    }
+    raw_bytes = round(statistics.mean(len(r.text.encode("utf-8")) for r in responses.values()))
+
+    redis_url = args.redis_url
+    if redis_url is None:
+        stub = create_server(port=0)
+        threading.Thread(target=stub.serve_forever, daemon=True).start()
+        redis_url = f"redis://127.0.0.1:{stub.server_address[1]}/0"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends = {
+            "memory": lambda: MemoryBackend(256 * 1024 * 1024),
+            "sqlite": lambda: SQLiteBackend(os.path.join(tmp, "cache.sqlite3"), 256 * 1024 * 1024),
+            "redis": lambda: RedisBackend(redis_url, namespace="etlab-api:benchmark:"),
+        }
+
+        print(f"pages: {', '.join(PAGES)}  mean page: {raw_bytes} bytes  redis: {redis_url}")
+        header = f"{'case':28} {'set us':>9} {'get us':>9} {'stored bytes':>13} {'ratio':>6}"
+        print(header)
+        print("-" * len(header))
+        for backend_name, build in backends.items():
+            for codec_name, codec in codecs().items():
+                name = f"{backend_name}/{codec_name}"
+                if args.pattern and args.pattern not in name:
+                    continue
+                row = measure(build(), codec, responses, args.repeat)
+                print(
+                    f"{name:28} {row['set_us']:>9.1f} {row['get_us']:>9.1f} "
+                    f"{row['stored_bytes']:>13} {row['stored_bytes'] / raw_bytes:>6.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
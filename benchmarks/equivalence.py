@@ -0,0 +1,128 @@
+"""Check rewritten parsers against their frozen originals in benchmarks/legacy.py.
+
+Every fixture variation is parsed by both versions with each available
+parser backend, with and without the page's strainer where it has one, and
+the results must be equal. Exits non-zero on the first
+mismatch, printing both results.
+
+    python -m benchmarks.equivalence
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fixtures, legacy  # noqa: E402
+from app.routes.academic_analysis import parse_semester_data  # noqa: E402
+from app.routes.attendance import parse_attendance  # noqa: E402
+from app.routes.end_semester_results import parse_detailed_results  # noqa: E402
+from app.routes.results import parse_results  # noqa: E402
+from app.utils.html_parser import HAS_LXML, PAGE_TAGS  # noqa: E402
+
+BACKENDS = ["html.parser"] + (["lxml"] if HAS_LXML else [])
+SEEDS = range(1, 6)
+
+
+def soups(markup, page):
+    """Yield (label, soup factory) for each backend, unstrained and strained to page."""
+    for backend in BACKENDS:
+        yield backend, lambda backend=backend: BeautifulSoup(markup, backend)
+        strainer = SoupStrainer(PAGE_TAGS[page])
+        yield backend + "+strainer", lambda backend=backend, strainer=strainer: BeautifulSoup(markup, backend, parse_only=strainer)
+
+
+def quietly(parse, *args):
+    """Call parse with its debug prints swallowed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return parse(*args)
+
+
+def academic_analysis_cases():
+    """Yield (name, expected, actual) for the academic analysis parser."""
+    for backend in BACKENDS:
+        for seed in SEEDS:
+            for semesters in range(0, 9):
+                for nesting in (1, 6, 40):
+                    name = f"academic_analysis/{backend}/seed={seed}/semesters={semesters}/nesting={nesting}"
+                    table = fixtures.academic_analysis_page(semesters, nesting=nesting, seed=seed)
+                    cards = fixtures.academic_analysis_page(semesters, layout="divs", nesting=nesting, seed=seed)
+                    expected = legacy.parse_semester_data(BeautifulSoup(table, backend))
+                    yield name + "/table", expected, parse_semester_data(BeautifulSoup(table, backend))
+
+                    # The card layout carries the same figures as the table.
+                    # The original also emitted a copy of every card for each
+                    # div around it, so only the page wide parts are compared
+                    # with its card output.
+                    old = legacy.parse_semester_data(BeautifulSoup(cards, backend))
+                    new = parse_semester_data(BeautifulSoup(cards, backend))
+                    yield name + "/cards", expected["semesters"], new["semesters"]
+                    yield (
+                        name + "/cards/overall",
+                        (old["overall_stats"], old["backlogs_info"]),
+                        (new["overall_stats"], new["backlogs_info"]),
+                    )
+
+
+def results_cases():
+    for seed in SEEDS:
+        for rows in (0, 1, 6, 30):
+            markup = fixtures.results_page(rows, seed=seed)
+            for label, soup in soups(markup, "results"):
+                for semester in (None, *range(1, 9)):
+                    yield (
+                        f"results/{label}/seed={seed}/rows={rows}/semester={semester}",
+                        quietly(legacy.parse_results, soup(), semester),
+                        quietly(parse_results, soup(), semester),
+                    )
+
+
+def exam_detail_cases():
+    for seed in SEEDS:
+        for subjects in (0, 1, 8, 60):
+            for exam_id in (1000, 1003):
+                markup = fixtures.exam_detail_page(subjects, exam_id=exam_id, seed=seed)
+                for label, soup in soups(markup, "exam_detail"):
+                    yield (
+                        f"exam_detail/{label}/seed={seed}/subjects={subjects}/exam_id={exam_id}",
+                        legacy.parse_detailed_results(soup(), "url"),
+                        parse_detailed_results(soup(), "url"),
+                    )
+
+
+def attendance_cases():
+    for seed in SEEDS:
+        for subjects in (1, 7, 40):
+            markup = fixtures.attendance_subject_page(subjects, seed=seed)
+            for label, soup in soups(markup, "attendance"):
+                yield (
+                    f"attendance/{label}/seed={seed}/subjects={subjects}",
+                    legacy.parse_attendance(soup()),
+                    parse_attendance(soup()),
+                )
+
+
+CHECKS = [academic_analysis_cases, results_cases, exam_detail_cases, attendance_cases]
+
+
+def main():
+    checked = 0
+    for check in CHECKS:
+        for name, expected, actual in check():
+            checked += 1
+            if expected != actual:
+                print(f"MISMATCH {name}")
+                print("expected:", json.dumps(expected, indent=2, sort_keys=True))
+                print("actual:  ", json.dumps(actual, indent=2, sort_keys=True))
+                return 1
+    print(f"{checked} cases equivalent")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
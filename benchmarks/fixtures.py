@@ -0,0 +1,292 @@
+"""Anonymized stand-ins for the ETLab pages the API scrapes.
+
+Every builder is deterministic and only uses made-up names and numbers, so
+the pages can be committed, benchmarked and served by the load-test stub
+without touching real student data. Sizes are chosen to match what the
+portal returns for a typical student ("realistic") and for the largest
+accounts we have seen ("worst").
+"""
+
+import random
+
+ORDINALS = ["1st", "2nd", "3rd", "4th", "5th", "6th", "7th", "8th"]
+ROMAN_ORDINALS = ["1st", "IInd", "IIIrd", "IVth", "Vth", "VIth", "VIIth", "VIIIth"]
+SEMESTER_WORDS = ["First", "Second", "Third", "Fourth", "Fifth", "Sixth", "Seventh", "Eighth"]
+GRADES = ["S", "A+", "A", "B+", "B", "C+", "C", "P"]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July",
+          "August", "September", "October", "November", "December"]
+
+
+def _rng(seed):
+    return random.Random(seed)
+
+
+def _subject(rnd, index):
+    code = f"{rnd.choice(['CST', 'MAT', 'HUT', 'EST', 'CSL'])}{300 + index:03d}"
+    return code, f"Subject Name {index:02d}"
+
+
+def page(title, body, nav_items=60, nesting=6):
+    """Wrap body in the portal layout: head assets, menu and nested containers."""
+    menu = "".join(
+        f'<li class="menu-item"><a href="/menu/{i}"><i class="icon-{i}"></i> Menu entry {i}</a></li>'
+        for i in range(nav_items)
+    )
+    scripts = "".join(
+        f'<script type="text/javascript" src="/assets/js/bundle-{i}.js"></script>'
+        for i in range(12)
+    )
+    inline_script = "<script>var config = {" + ",".join(
+        f'"k{i}": "{"v" * 20}"' for i in range(40)
+    ) + "};</script>"
+    open_divs = "".join(f'<div class="container level-{i}">' for i in range(nesting))
+    close_divs = "</div>" * nesting
+    return (
+        "<!DOCTYPE html><html><head>"
+        '<meta charset="utf-8">'
+        f"<title>{title}</title>"
+        '<link rel="stylesheet" href="/assets/css/main.css">'
+        f"{scripts}{inline_script}"
+        "</head><body>"
+        f'<div class="navbar"><ul class="nav">{menu}</ul></div>'
+        f"{open_divs}{body}{close_divs}"
+        '<div class="footer">Powered by ETLab</div>'
+        "</body></html>"
+    )
+
+
+def login_page():
+    return page(
+        "ETLab | Login",
+        '<form id="login-form" method="post">'
+        '<input name="LoginForm[username]"><input name="LoginForm[password]" type="password">'
+        '<input type="submit" name="yt0" value="Login"></form>',
+        nav_items=0,
+    )
+
+
+def profile_page(extra_fields=0, seed=1):
+    rnd = _rng(seed)
+    fields = [
+        ("Name", "STUDENT ANON"), ("Gender", "Female"), ("Date of Birth", "01-01-2003"),
+        ("Religion", "Religion"), ("Place of Birth", "Town"), ("Mother Tongue", "Language"),
+        ("Nationality", "Indian"), ("Caste", "General"), ("Blood Group", "O+"),
+        ("Admission No", f"ADM{rnd.randint(1000, 9999)}"), ("University Reg No", "SHR21CS000"),
+        ("SR No", "1234"), ("ABC_ID", "000000000000"), ("Aadhaar No", "XXXX XXXX 0000"),
+        ("is Hosteler?", "No"), ("College Email Id", "student@example.edu"),
+        ("Boarding Point", "Stop"), ("Email", "student@example.com"),
+        ("Mobile No", "9000000000"), ("Father's Mobile No", "9000000001"),
+        ("Mother's Mobile No", "9000000002"), ("Father's Name", "PARENT ONE"),
+        ("Mother Name", "PARENT TWO"), ("Father's Occupation", "Occupation"),
+        ("Mother's Occupation", "Occupation"), ("Annual income", "100000"),
+        ("House Name", "House"), ("Street", "Street"), ("Post / Street 2", "Post"),
+        ("District", "District"), ("PIN", "680000"), ("State", "Kerala"),
+        ("Bank Name", "Bank"), ("Branch", "Branch"), ("Account no", "000000000"),
+        ("IFSC Code", "BANK0000000"), ("Personal Marks of identification 1", "Mark one"),
+        ("Personal Marks of identification 2", "Mark two"),
+        ("Achievements", "No achievements added"),
+    ]
+    fields += [(f"Custom Field {i}", f"Value {i}") for i in range(extra_fields)]
+
+    tables = []
+    for start in range(0, len(fields), 8):
+        rows = "".join(
+            f"<tr><th>{label} :</th><td> {value} </td></tr>"
+            for label, value in fields[start:start + 8]
+        )
+        tables.append(f'<div class="widget"><table class="detail-view">{rows}</table></div>')
+    return page("ETLab | Student Profile", "".join(tables))
+
+
+def results_page(rows_per_section=6, seed=1):
+    rnd = _rng(seed)
+    sections = [
+        ("Sessional Exams", "No sessional exams yet", "Series Test"),
+        ("Module Test", "No module test yet", "Module"),
+        ("Class Project", "No class projects yet", "Project"),
+        ("Assignments", "No assignments yet", "Assignment"),
+        ("Tutorials", "No tutorials yet", "Tutorial"),
+    ]
+    body = []
+    for header, empty, kind in sections:
+        rows = ["<tr><th>Subject</th><th>Semester</th><th>Exam</th><th>Maximum Marks</th><th>Marks Obtained</th></tr>"]
+        if rows_per_section == 0:
+            rows.append(f'<tr><td colspan="5">{empty}</td></tr>')
+        for i in range(rows_per_section):
+            code, name = _subject(rnd, i % 12)
+            semester = rnd.choice(["S5", "Fifth", "S6", "Fourth"])
+            rows.append(
+                f"<tr><td>{code} - {name}</td><td>{semester}</td><td>{kind} {i + 1}</td>"
+                f"<td>50</td><td>{rnd.randint(10, 50)}</td></tr>"
+            )
+        body.append(
+            f'<div class="widget"><h5>\n  {header}\n</h5>'
+            f'<div class="widget-content"><table class="items">{"".join(rows)}</table></div></div>'
+        )
+    return page("ETLab | Results", "".join(body))
+
+
+def attendance_subject_page(subjects=7, seed=1):
+    rnd = _rng(seed)
+    headers = ["University Reg No", "Roll No", "Name"]
+    cells = ["SHR21CS000", "1", "STUDENT ANON"]
+    total_present = total = 0
+    for i in range(subjects):
+        code, _ = _subject(rnd, i)
+        held = rnd.randint(20, 60)
+        present = rnd.randint(0, held)
+        total += held
+        total_present += present
+        headers.append(code)
+        cells.append(f"{present}/{held} ({round(present * 100 / held)}%)")
+    headers += ["Total", "Percentage"]
+    cells += [f"{total_present}/{total}", f"{round(total_present * 100 / total)}%"]
+    table = (
+        '<table class="items"><thead><tr>'
+        + "".join(f"<th>{h}</th>" for h in headers)
+        + "</tr></thead><tbody><tr>"
+        + "".join(f"<td>{c}</td>" for c in cells)
+        + "</tr></tbody></table>"
+    )
+    return page("ETLab | Attendance", table)
+
+
+def attendance_calendar_page(month=3, year=2024, semester=6, days=31, hours=6, seed=1):
+    rnd = _rng(seed)
+    rows = []
+    for day in range(1, days + 1):
+        suffix = {1: "st", 2: "nd", 3: "rd"}.get(day % 10 if day not in (11, 12, 13) else 0, "th")
+        if day % 7 == 0:
+            rows.append(f'<tr><th>{day}{suffix}</th><td colspan="{hours}" class="holiday">Sunday</td></tr>')
+            continue
+        cells = []
+        for hour in range(hours):
+            status = rnd.choice(["present", "present", "present", "present", "absent", "dutyleave", "free"])
+            if status == "free":
+                cells.append('<td class="free"></td>')
+                continue
+            code, name = _subject(rnd, hour)
+            cells.append(
+                f'<td class="{status}">{code} - {name}\n<br><span class="faculty">Faculty {hour}</span></td>'
+            )
+        rows.append(f"<tr><th>{day}{suffix}</th>{''.join(cells)}</tr>")
+
+    def select(name, options, selected):
+        html = f'<select name="{name}">'
+        for value, label in options:
+            marker = ' selected="selected"' if value == selected else ""
+            html += f'<option value="{value}"{marker}>{label}</option>'
+        return html + "</select>"
+
+    form = (
+        '<form method="post">'
+        + select("semester", [(8 + s, f"S{s}") for s in range(1, 9)], 8 + semester)
+        + select("month", [(m, MONTHS[m - 1]) for m in range(1, 13)], month)
+        + select("year", [(y, f" {y} ") for y in range(year - 4, year + 1)], year)
+        + "</form>"
+    )
+    table = (
+        '<table id="itsthetable" class="table"><thead><tr><th>Day</th>'
+        + "".join(f"<th>{h + 1}</th>" for h in range(hours))
+        + f"</tr></thead><tbody>{''.join(rows)}</tbody></table>"
+    )
+    return page("ETLab | Attendance", form + table)
+
+
+def timetable_csv(days=6, periods=7, seed=1):
+    rnd = _rng(seed)
+    lines = ["Day," + ",".join(f"Period {p + 1}" for p in range(periods)), "," * periods]
+    for day in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"][:days]:
+        cells = []
+        for p in range(periods):
+            code, name = _subject(rnd, (p + days) % 9)
+            cells.append(f'"{code} {name}<br/>[ Theory ]<br/>Faculty {p}"' if rnd.random() > 0.2 else '""')
+        lines.append(f"{day}," + ",".join(cells))
+    return "\n".join(lines) + "\n"
+
+
+def academic_analysis_page(semesters=6, layout="table", nesting=6, seed=1):
+    rnd = _rng(seed)
+    cgpa = 0
+    credit = 0
+    rows = []
+    for index in range(semesters):
+        sgpa = round(rnd.uniform(6, 10), 2)
+        earned = rnd.randint(18, 24)
+        credit += earned
+        cgpa = round((cgpa * index + sgpa) / (index + 1), 2)
+        held = rnd.randint(400, 480)
+        present = rnd.randint(300, held)
+        rows.append((ROMAN_ORDINALS[index % 8] if index % 2 else ORDINALS[index % 8],
+                     present, held, sgpa, earned, credit, cgpa, rnd.choice(["Pass", "Pass", "Fail"])))
+
+    if layout == "table":
+        body = '<table class="table"><tr><th>Semester</th><th>Attendance</th><th>SGPA</th><th>Earned Credit</th><th>Cumulative Credit</th><th>CGPA</th><th>Result</th></tr>'
+        for name, present, held, sgpa, earned, cum, cg, result in rows:
+            body += (
+                f"<tr><td>{name} Semester</td><td>{present}/{held} ({round(present * 100 / held)}%)</td>"
+                f"<td>{sgpa}</td><td>{earned}</td><td>{cum}</td><td>{cg}</td><td>{result}</td></tr>"
+            )
+        body += "</table>"
+    else:
+        # Card layout: every semester is a stack of nested divs and the
+        # numbers only appear as "Label: value" text.
+        body = ""
+        for name, present, held, sgpa, earned, cum, cg, result in rows:
+            inner = (
+                f'<div class="card-title">{name} Semester</div>'
+                f'<div class="card-body"><span>Attendance: {present}/{held} ({round(present * 100 / held)}%)</span> '
+                f"<span>SGPA: {sgpa}</span> <span>Earned Credit: {earned}</span> "
+                f"<span>Cumulative Credit: {cum}</span> <span>CGPA: {cg}</span> <span>Result: {result}</span></div>"
+            )
+            body += "".join(f'<div class="wrap-{d}">' for d in range(nesting)) + inner + "</div>" * nesting
+    body += (
+        f'<div class="summary">CGPA: {cgpa} Cumulative Credit: {credit} '
+        f"Total Backlogs: {sum(1 for r in rows if r[-1] == 'Fail')} Current Backlogs: 0</div>"
+    )
+    return page("ETLab | Academics", body, nesting=nesting)
+
+
+def exam_list_page(exams=6, base_path="/universityexam/student/viewresult"):
+    body = ""
+    for index in range(exams):
+        word = SEMESTER_WORDS[index % 8]
+        body += (
+            '<div class="row-fluid">'
+            f'<div style="background-color:#0864a2;color:#fff;padding:5px">B.Tech {word} Semester (R) Exam '
+            f"{MONTHS[(index * 5) % 12]} {2021 + index // 2} (2021 Admission)</div>"
+            f'<div class="span3"><a href="{base_path}?id={1000 + index}">View Result</a></div>'
+            '<div class="span3"><a href="/universityexam/student/revaluation">Apply revaluation</a></div>'
+            "</div>"
+        )
+    return page("ETLab | Exam Results", body)
+
+
+def exam_detail_page(subjects=8, exam_id=1000, seed=1):
+    rnd = _rng(seed + exam_id)
+    semester = SEMESTER_WORDS[exam_id % 8]
+    details = "".join(
+        f"<tr><td> {label} </td><td>{value}</td></tr>"
+        for label, value in [
+            ("Name of Exam", f"B.Tech {semester} Semester (R) Exam"),
+            ("Degree", "B.Tech"), ("Semester", semester),
+            ("Academic Year", "2023-24"), ("Month", "November"), ("Year", "2023"),
+        ]
+    )
+    rows = ""
+    for index in range(subjects):
+        code, name = _subject(rnd, index)
+        rows += (
+            f"<tr><td>{code}</td><td>{name}</td><td>{rnd.randint(2, 4)}</td>"
+            f"<td>{rnd.choice(GRADES)}</td><td>Pass</td></tr>"
+        )
+    rows += (
+        f"<tr><td>Earned Credit</td><td>{rnd.randint(18, 24)}</td></tr>"
+        f"<tr><td>SGPA</td><td>{round(rnd.uniform(6, 10), 2)}</td></tr>"
+        f"<tr><td>CGPA</td><td>{round(rnd.uniform(6, 10), 2)}</td></tr>"
+    )
+    table = (
+        '<table class="table"><thead><tr><th>Course Code</th><th>Course</th><th>Credit</th>'
+        f"<th>Grade</th><th>Result</th></tr></thead><tbody>{rows}</tbody></table>"
+    )
+    return page("ETLab | Exam Result", f'<table class="detail">{details}</table>{table}')
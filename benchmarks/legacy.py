@@ -0,0 +1,533 @@
+"""
+Frozen copies of parsers that have since been rewritten, kept so
+benchmarks.equivalence can check the rewrites still return the same data.
+"""
+
+import re
+
+
+def parse_semester_data(soup):
+    """
+    Parse academic analysis data from the HTML page
+    Based on the actual structure from the academic analysis page
+    """
+    semesters = []
+    
+    try:
+        # Method 1: Look for semester data in the exact structure from the screenshot
+        # The data appears to be in a specific layout with semester names followed by metrics
+        
+        # Find all text that contains semester information
+        all_text = soup.get_text()
+        
+        # Look for patterns like "1st Semester", "IInd Semester", etc.
+        semester_patterns = [
+            r'(1st\s+Semester)',
+            r'(2nd\s+Semester|IInd\s+Semester)', 
+            r'(3rd\s+Semester|IIIrd\s+Semester)',
+            r'(4th\s+Semester|IVth\s+Semester)',
+            r'(5th\s+Semester|Vth\s+Semester)',
+            r'(6th\s+Semester|VIth\s+Semester)',
+            r'(7th\s+Semester|VIIth\s+Semester)',
+            r'(8th\s+Semester|VIIIth\s+Semester)'
+        ]
+        
+        # Method 2: Look for table-based structure
+        tables = soup.find_all('table')
+        for table in tables:
+            rows = table.find_all('tr')
+            for row in rows:
+                cells = row.find_all('td')
+                if len(cells) >= 6:  # Should have semester, attendance, sgpa, credits, cgpa, result
+                    first_cell_text = cells[0].get_text(strip=True)
+                    
+                    # Check if this row contains semester information
+                    semester_match = None
+                    semester_number = 0
+                    
+                    for i, pattern in enumerate(semester_patterns, 1):
+                        if re.search(pattern, first_cell_text, re.IGNORECASE):
+                            semester_match = first_cell_text
+                            semester_number = i
+                            break
+                    
+                    if semester_match:
+                        semester_data = {
+                            'semester_name': semester_match,
+                            'semester_number': semester_number
+                        }
+                        
+                        # Parse attendance (format: "435/450 (97%)")
+                        if len(cells) > 1:
+                            attendance_text = cells[1].get_text(strip=True)
+                            attendance_match = re.search(r'(\d+)/(\d+)\s*\((\d+)%\)', attendance_text)
+                            if attendance_match:
+                                semester_data['attendance'] = {
+                                    'present': int(attendance_match.group(1)),
+                                    'total': int(attendance_match.group(2)),
+                                    'percentage': int(attendance_match.group(3))
+                                }
+                            else:
+                                semester_data['attendance'] = {'present': 0, 'total': 0, 'percentage': 0}
+                        
+                        # Parse SGPA
+                        if len(cells) > 2:
+                            sgpa_text = cells[2].get_text(strip=True)
+                            try:
+                                semester_data['sgpa'] = float(sgpa_text) if sgpa_text else 0.0
+                            except ValueError:
+                                semester_data['sgpa'] = 0.0
+                        
+                        # Parse Earned Credit
+                        if len(cells) > 3:
+                            earned_credit_text = cells[3].get_text(strip=True)
+                            try:
+                                semester_data['earned_credit'] = int(earned_credit_text) if earned_credit_text else 0
+                            except ValueError:
+                                semester_data['earned_credit'] = 0
+                        
+                        # Parse Cumulative Credit
+                        if len(cells) > 4:
+                            cumulative_credit_text = cells[4].get_text(strip=True)
+                            try:
+                                semester_data['cumulative_credit'] = int(cumulative_credit_text) if cumulative_credit_text else 0
+                            except ValueError:
+                                semester_data['cumulative_credit'] = 0
+                        
+                        # Parse CGPA
+                        if len(cells) > 5:
+                            cgpa_text = cells[5].get_text(strip=True)
+                            try:
+                                semester_data['cgpa'] = float(cgpa_text) if cgpa_text else 0.0
+                            except ValueError:
+                                semester_data['cgpa'] = 0.0
+                        
+                        # Parse Result
+                        if len(cells) > 6:
+                            result_text = cells[6].get_text(strip=True)
+                            semester_data['result'] = result_text if result_text else 'N/A'
+                        else:
+                            semester_data['result'] = 'N/A'
+                        
+                        semesters.append(semester_data)
+        
+        # Method 3: Alternative parsing for different page structures
+        if not semesters:
+            # Try to find semester data in div elements or other structures
+            semester_divs = soup.find_all('div')
+            for div in semester_divs:
+                div_text = div.get_text(strip=True)
+                
+                # Look for semester pattern in div text
+                for i, pattern in enumerate(semester_patterns, 1):
+                    if re.search(pattern, div_text, re.IGNORECASE):
+                        # Found a semester, now try to extract data from surrounding elements
+                        semester_data = {
+                            'semester_name': re.search(pattern, div_text, re.IGNORECASE).group(1),
+                            'semester_number': i
+                        }
+                        
+                        # Look for attendance, SGPA, CGPA patterns in the same div or nearby divs
+                        attendance_match = re.search(r'Attendance:\s*(\d+)/(\d+)\s*\((\d+)%\)', div_text, re.IGNORECASE)
+                        if attendance_match:
+                            semester_data['attendance'] = {
+                                'present': int(attendance_match.group(1)),
+                                'total': int(attendance_match.group(2)),
+                                'percentage': int(attendance_match.group(3))
+                            }
+                        
+                        sgpa_match = re.search(r'SGPA:\s*([0-9.]+)', div_text, re.IGNORECASE)
+                        if sgpa_match:
+                            semester_data['sgpa'] = float(sgpa_match.group(1))
+                        
+                        cgpa_match = re.search(r'CGPA:\s*([0-9.]+)', div_text, re.IGNORECASE)
+                        if cgpa_match:
+                            semester_data['cgpa'] = float(cgpa_match.group(1))
+                        
+                        earned_credit_match = re.search(r'Earned Credit:\s*(\d+)', div_text, re.IGNORECASE)
+                        if earned_credit_match:
+                            semester_data['earned_credit'] = int(earned_credit_match.group(1))
+                        
+                        cumulative_credit_match = re.search(r'Cumulative Credit:\s*(\d+)', div_text, re.IGNORECASE)
+                        if cumulative_credit_match:
+                            semester_data['cumulative_credit'] = int(cumulative_credit_match.group(1))
+                        
+                        result_match = re.search(r'Result:\s*(\w+)', div_text, re.IGNORECASE)
+                        if result_match:
+                            semester_data['result'] = result_match.group(1)
+                        
+                        # Only add if we found some meaningful data
+                        if len(semester_data) > 2:  # More than just name and number
+                            semesters.append(semester_data)
+                        break
+        
+        # Extract overall statistics if available
+        overall_stats = {}
+        page_text = soup.get_text()
+        
+        # Look for overall CGPA
+        overall_cgpa_match = re.search(r'CGPA:\s*([0-9.]+)', page_text)
+        if overall_cgpa_match:
+            overall_stats['overall_cgpa'] = float(overall_cgpa_match.group(1))
+        
+        # Look for overall cumulative credit
+        overall_credit_match = re.search(r'Cumulative Credit:\s*(\d+)', page_text)
+        if overall_credit_match:
+            overall_stats['overall_cumulative_credit'] = int(overall_credit_match.group(1))
+        
+        # Extract backlogs information if available
+        backlogs_info = {}
+        
+        # Look for backlogs data
+        total_backlogs_match = re.search(r'Total Backlogs[:\s]*(\d+)', page_text, re.IGNORECASE)
+        if total_backlogs_match:
+            backlogs_info['total_backlogs'] = int(total_backlogs_match.group(1))
+        
+        current_backlogs_match = re.search(r'Current Backlogs[:\s]*(\d+)', page_text, re.IGNORECASE)
+        if current_backlogs_match:
+            backlogs_info['current_backlogs'] = int(current_backlogs_match.group(1))
+        
+        return {
+            'semesters': semesters,
+            'overall_stats': overall_stats,
+            'backlogs_info': backlogs_info
+        }
+        
+    except Exception as e:
+        print(f"Error parsing semester data: {e}")
+        return {
+            'semesters': [],
+            'overall_stats': {},
+            'backlogs_info': {},
+            'error': str(e)
+        }
+
+
+def parse_results(soup, semester):
+    """Parse the internal assessment tables of the results page.
+
+    Rows are filtered to the requested semester when one is given.
+    """
+    response_body = {
+        "sessional_exams": [],
+        "module_tests": [],
+        "class_projects": [],
+        "assignments": [],
+        "tutorials": []
+    }
+
+    try:
+        # Parse Sessional Exams (using robust search for header with whitespace)
+        sessional_section = soup.find("h5", string=lambda text: text and "sessional" in text.lower() and "exam" in text.lower())
+        if sessional_section:
+            print("DEBUG: Found Sessional exams section")
+            sessional_table = sessional_section.find_next("table")
+            if sessional_table:
+                print("DEBUG: Found sessional table")
+                rows = sessional_table.find_all("tr")[1:]  # Skip header row
+                print(f"DEBUG: Found {len(rows)} rows in sessional table")
+                for row in rows:
+                    cells = row.find_all("td")
+                    if len(cells) >= 5:  # Based on exploration: Subject, Semester, Exam, Maximum Marks, Marks Obtained
+                        subject_text = cells[0].text.strip()
+                        semester_text = cells[1].text.strip()
+                        
+                        print(f"DEBUG: Processing row - Subject: {subject_text}, Semester: {semester_text}")
+                        
+                        # Skip empty or "No ..." rows
+                        if "No" in subject_text and "yet" in subject_text:
+                            continue
+                            
+                        # Split subject code and name if they exist
+                        if " - " in subject_text:
+                            subject_code = subject_text.split(" - ")[0]
+                            subject_name = subject_text.split(" - ")[1]
+                        else:
+                            subject_code = subject_text
+                            subject_name = subject_text
+                        
+                        subject_info = {
+                            "subject_code": subject_code,
+                            "subject_name": subject_name,
+                            "semester": semester_text,
+                            "exam": cells[2].text.strip(),
+                            "maximum_marks": cells[3].text.strip(),
+                            "marks_obtained": cells[4].text.strip(),
+                        }
+                        
+                        # Filter by requested semester
+                        if semester_matches(semester_text, semester):
+                            response_body["sessional_exams"].append(subject_info)
+                            print(f"DEBUG: Added sessional exam: {subject_code}")
+
+        # Parse Module Tests (using robust search)
+        module_section = soup.find("h5", string=lambda text: text and "module" in text.lower() and "test" in text.lower())
+        if module_section:
+            print("DEBUG: Found Module Test section")
+            module_table = module_section.find_next("table")
+            if module_table:
+                print("DEBUG: Found module table")
+                rows = module_table.find_all("tr")[1:]  # Skip header row
+                print(f"DEBUG: Found {len(rows)} rows in module table")
+                for row in rows:
+                    cells = row.find_all("td")
+                    if len(cells) >= 1:
+                        first_cell = cells[0].text.strip()
+                        if "No module test yet" in first_cell:
+                            print("DEBUG: No module tests available")
+                            continue
+                            
+                        if len(cells) >= 5:
+                            test_info = {
+                                "subject": cells[0].text.strip(),
+                                "semester": cells[1].text.strip(),
+                                "exam": cells[2].text.strip(),
+                                "maximum_marks": cells[3].text.strip(),
+                                "marks_obtained": cells[4].text.strip(),
+                            }
+                            
+                            # Filter by requested semester
+                            if semester_matches(test_info["semester"], semester):
+                                response_body["module_tests"].append(test_info)
+                                print(f"DEBUG: Added module test: {test_info['subject']}")
+
+        # Parse Class Projects (using robust search)
+        projects_section = soup.find("h5", string=lambda text: text and "class" in text.lower() and "project" in text.lower())
+        if projects_section:
+            print("DEBUG: Found Class Projects section")
+            projects_table = projects_section.find_next("table")
+            if projects_table:
+                print("DEBUG: Found projects table")
+                rows = projects_table.find_all("tr")[1:]  # Skip header row
+                print(f"DEBUG: Found {len(rows)} rows in projects table")
+                for row in rows:
+                    cells = row.find_all("td")
+                    if len(cells) >= 1:
+                        first_cell = cells[0].text.strip()
+                        if "No class projects yet" in first_cell:
+                            print("DEBUG: No class projects available")
+                            continue
+                            
+                        if len(cells) >= 5:
+                            project_info = {
+                                "subject": cells[0].text.strip(),
+                                "semester": cells[1].text.strip(),
+                                "class_project": cells[2].text.strip(),
+                                "maximum_marks": cells[3].text.strip(),
+                                "marks_obtained": cells[4].text.strip(),
+                            }
+                            
+                            # Filter by requested semester
+                            if semester_matches(project_info["semester"], semester):
+                                response_body["class_projects"].append(project_info)
+                                print(f"DEBUG: Added class project: {project_info['subject']}")
+
+        # Parse Assignments (using robust search)
+        assignments_section = soup.find("h5", string=lambda text: text and "assignment" in text.lower())
+        if assignments_section:
+            print("DEBUG: Found Assignments section")
+            assignments_table = assignments_section.find_next("table")
+            if assignments_table:
+                print("DEBUG: Found assignments table")
+                rows = assignments_table.find_all("tr")[1:]  # Skip header row
+                print(f"DEBUG: Found {len(rows)} rows in assignments table")
+                for row in rows:
+                    cells = row.find_all("td")
+                    if len(cells) >= 1:
+                        first_cell = cells[0].text.strip()
+                        if "No" in first_cell and "yet" in first_cell:
+                            print("DEBUG: No assignments available")
+                            continue
+                            
+                        if len(cells) >= 5:
+                            assignment_info = {
+                                "subject": cells[0].text.strip(),
+                                "semester": cells[1].text.strip(),
+                                "assignment": cells[2].text.strip(),
+                                "maximum_marks": cells[3].text.strip(),
+                                "marks_obtained": cells[4].text.strip(),
+                            }
+                            
+                            # Filter by requested semester
+                            if semester_matches(assignment_info["semester"], semester):
+                                response_body["assignments"].append(assignment_info)
+                                print(f"DEBUG: Added assignment: {assignment_info['subject']}")
+
+        # Parse Tutorials (using robust search)
+        tutorials_section = soup.find("h5", string=lambda text: text and "tutorial" in text.lower())
+        if tutorials_section:
+            print("DEBUG: Found Tutorials section")
+            tutorials_table = tutorials_section.find_next("table")
+            if tutorials_table:
+                print("DEBUG: Found tutorials table")
+                rows = tutorials_table.find_all("tr")[1:]  # Skip header row
+                print(f"DEBUG: Found {len(rows)} rows in tutorials table")
+                for row in rows:
+                    cells = row.find_all("td")
+                    if len(cells) >= 1:
+                        first_cell = cells[0].text.strip()
+                        if "No" in first_cell and "yet" in first_cell:
+                            print("DEBUG: No tutorials available")
+                            continue
+                            
+                        if len(cells) >= 5:
+                            tutorial_info = {
+                                "subject": cells[0].text.strip(),
+                                "semester": cells[1].text.strip(),
+                                "title": cells[2].text.strip(),
+                                "maximum_marks": cells[3].text.strip(),
+                                "marks_obtained": cells[4].text.strip(),
+                            }
+                            
+                            # Filter by requested semester
+                            if semester_matches(tutorial_info["semester"], semester):
+                                response_body["tutorials"].append(tutorial_info)
+                                print(f"DEBUG: Added tutorial: {tutorial_info['subject']}")
+
+    except Exception as e:
+        # Log the error but don't fail completely
+        print(f"Error parsing results: {e}")
+        # Return empty results instead of failing
+
+    # Add debug information
+    print(f"Debug: Found {len(response_body['sessional_exams'])} sessional exams for semester {semester}")
+    print(f"Debug: Found {len(response_body['module_tests'])} module tests for semester {semester}")
+    print(f"Debug: Found {len(response_body['class_projects'])} class projects for semester {semester}")
+    print(f"Debug: Found {len(response_body['assignments'])} assignments for semester {semester}")
+    print(f"Debug: Found {len(response_body['tutorials'])} tutorials for semester {semester}")
+
+    # Add summary information
+    response_body["total_sessional_exams"] = len(response_body["sessional_exams"])
+    response_body["total_module_tests"] = len(response_body["module_tests"])
+    response_body["total_class_projects"] = len(response_body["class_projects"])
+    response_body["total_assignments"] = len(response_body["assignments"])
+    response_body["total_tutorials"] = len(response_body["tutorials"])
+    
+    # Add debug info to response for troubleshooting
+    response_body["debug_info"] = {
+        "requested_semester": semester,
+        "semester_filter_applied": semester is not None,
+        "sections_found": ["sessional_exams", "module_tests", "class_projects", "assignments", "tutorials"],
+        "note": "ETLab results may show current semester data regardless of requested semester parameter"
+    }
+
+    return response_body
+
+
+def semester_matches(semester_text, requested_semester):
+    """Helper function to match semester text with requested semester number"""
+    if not semester_text:
+        return False
+    
+    # If no specific semester requested, return all results
+    if requested_semester is None:
+        return True
+        
+    semester_mapping = {
+        1: ["first", "1st", "i", "1"],
+        2: ["second", "2nd", "ii", "2"],
+        3: ["third", "3rd", "iii", "3", "IIIrd"],
+        4: ["fourth", "4th", "iv", "4"],
+        5: ["fifth", "5th", "v", "5"],
+        6: ["sixth", "6th", "vi", "6"],
+        7: ["seventh", "7th", "vii", "7"],
+        8: ["eighth", "8th", "viii", "8"]
+    }
+    
+    semester_text_lower = semester_text.lower()
+    
+    # Direct number match
+    if str(requested_semester) in semester_text_lower:
+        return True
+    
+    # Text-based matching
+    if requested_semester in semester_mapping:
+        for variant in semester_mapping[requested_semester]:
+            if variant.lower() in semester_text_lower:
+                return True
+    
+    # Debug message for unmatched semesters
+    print(f"Debug: Semester text '{semester_text}' didn't match requested semester {requested_semester}")
+    return False  # Only return matching semester results
+
+
+def parse_detailed_results(soup, url):
+    """Extract the exam details, subject grades and SGPA/CGPA of a result page."""
+    # --- Part 1: Precisely find the exam details ---
+    exam_details = {}
+    labels = {"Name of Exam": "nameOfExam", "Degree": "degree", "Semester": "semester", 
+              "Academic Year": "academicYear", "Month": "month", "Year": "year"}
+
+    for label_text, key_name in labels.items():
+        # Find a <td> containing the exact label text (ignoring whitespace)
+        label_element = soup.find('td', string=re.compile(r'\s*' + re.escape(label_text) + r'\s*'))
+        if label_element:
+            # Find the very next <td> sibling, which holds the value
+            value_element = label_element.find_next_sibling('td')
+            if value_element:
+                exam_details[key_name] = value_element.get_text(strip=True)
+
+    # --- Part 2: Precisely find the main results table ---
+    main_table = None
+    # Find all tables and loop through them
+    for table in soup.find_all("table"):
+        # The correct table is the one with a "Course Code" header
+        if table.find('th', string=re.compile(r'Course Code')):
+            main_table = table
+            break
+
+    if not main_table:
+        return {"error": "Could not find the main results table with expected headers.", "url": url}
+
+    # --- Part 3: Parse the now-correctly-identified table ---
+    subjects, summary = [], {}
+    headers_list = [th.text.strip() for th in main_table.find_all("th")]
+    rows = main_table.find("tbody").find_all("tr") if main_table.find("tbody") else main_table.find_all("tr")[1:]
+
+    for row in rows:
+        cols = row.find_all("td")
+        if not cols: continue
+
+        first_col_text = cols[0].text.strip()
+        if "Earned Credit" in first_col_text: summary["earnedCredit"] = cols[1].text.strip() if len(cols) > 1 else None
+        elif "SGPA" in first_col_text: summary["sgpa"] = cols[1].text.strip() if len(cols) > 1 else None
+        elif "CGPA" in first_col_text: summary["cgpa"] = cols[1].text.strip() if len(cols) > 1 else None
+        elif len(cols) == len(headers_list):
+            subjects.append({headers_list[i]: cols[i].text.strip() for i in range(len(headers_list))})
+
+    return {"examDetails": exam_details, "results": subjects, "summary": summary}
+
+
+def parse_attendance(soup):
+    """The inline parsing of the /attendance route."""
+    response_body = {}
+    table = soup.find("table", class_="items")
+    table_headers = table.find_all("th")
+    table_data = table.find_all("td")
+
+    response_body["university_reg_no"] = table_data[0].text
+    response_body["roll_no"] = table_data[1].text
+    response_body["name"] = table_data[2].text
+
+    for i in range(3, len(table_data) - 2):
+        subject_code = table_headers[i].text.strip()
+        attendance_str = table_data[i].text.strip()
+        present_hours = attendance_str.split("/")[0].strip()
+        total_hours = attendance_str.split("/")[1].split("(")[0].strip()
+        attendance_percentage = re.search(r"\((.*?)\)", attendance_str).group(1).strip()
+
+        subject_attendance = {}
+        subject_attendance["present_hours"] = present_hours
+        subject_attendance["total_hours"] = total_hours
+        subject_attendance["attendance_percentage"] = attendance_percentage
+
+        response_body[subject_code] = subject_attendance
+
+    response_body["total_present_hours"] = (
+        table_data[len(table_data) - 2].text.split("/")[0].strip()
+    )
+    response_body["total_hours"] = (
+        table_data[len(table_data) - 2].text.split("/")[1].strip()
+    )
+    response_body["total_perecentage"] = table_data[len(table_data) - 1].text
+    return response_body
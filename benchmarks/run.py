@@ -0,0 +1,209 @@
+"""Offline parse benchmarks.
+
+Runs every scraper parser over the fixture pages of benchmarks/fixtures.py
+and reports wall time, the blocks still allocated by the result and the
+peak traced memory. Network access is disabled while the suite runs.
+
+    python -m benchmarks.run                       # run everything
+    python -m benchmarks.run -k results            # only matching cases
+    python -m benchmarks.run --save benchmarks/baseline.json
+    python -m benchmarks.run --compare benchmarks/baseline.json
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import socket
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fixtures  # noqa: E402
+from app.routes.academic_analysis import parse_semester_data  # noqa: E402
+from app.routes.attendance import parse_attendance  # noqa: E402
+from app.routes.end_semester_results import parse_detailed_results  # noqa: E402
+from app.routes.profile import parse_profile  # noqa: E402
+from app.routes.results import parse_results  # noqa: E402
+from app.routes.timetable import parse_timetable  # noqa: E402
+from app.utils.attendance_calendar import parse_calendar  # noqa: E402
+from app.utils.cache import CachedResponse  # noqa: E402
+from app.utils.html_parser import parse_html, parser_backend  # noqa: E402
+from app.utils.upstream import is_login_page  # noqa: E402
+from config import Config  # noqa: E402
+
+
+def _academic_analysis(markup):
+    return parse_semester_data(parse_html(markup))
+
+
+def _exam_detail(markup):
+    return parse_detailed_results(parse_html(markup, "exam_detail"), "fixture")
+
+
+def _results(markup):
+    return parse_results(parse_html(markup, "results"), None)
+
+
+def _profile(markup):
+    return parse_profile(parse_html(markup, "profile"))
+
+
+def _attendance(markup):
+    return parse_attendance(parse_html(markup, "attendance"))
+
+
+def _calendar(markup):
+    return parse_calendar(parse_html(markup, "attendance_calendar"))
+
+
+def _login_check(markup):
+    # Served without a redirect, so the page itself has to be looked at
+    return is_login_page(CachedResponse(200, f"{Config.BASE_URL}/student/profile", markup, {}))
+
+
+# name -> (fixture builder, parser)
+CASES = {
+    "academic_analysis/realistic": (lambda: fixtures.academic_analysis_page(6), _academic_analysis),
+    "academic_analysis/worst": (lambda: fixtures.academic_analysis_page(8, layout="divs", nesting=80), _academic_analysis),
+    "exam_detail/realistic": (lambda: fixtures.exam_detail_page(8), _exam_detail),
+    "exam_detail/worst": (lambda: fixtures.exam_detail_page(60), _exam_detail),
+    "results/realistic": (lambda: fixtures.results_page(6), _results),
+    "results/worst": (lambda: fixtures.results_page(200), _results),
+    "profile/realistic": (lambda: fixtures.profile_page(), _profile),
+    "profile/worst": (lambda: fixtures.profile_page(extra_fields=400), _profile),
+    "timetable/realistic": (lambda: fixtures.timetable_csv(), parse_timetable),
+    "timetable/worst": (lambda: fixtures.timetable_csv(days=7, periods=14), parse_timetable),
+    "attendance/realistic": (lambda: fixtures.attendance_subject_page(7), _attendance),
+    "attendance/worst": (lambda: fixtures.attendance_subject_page(60), _attendance),
+    "attendance_calendar/realistic": (lambda: fixtures.attendance_calendar_page(), _calendar),
+    "attendance_calendar/worst": (lambda: fixtures.attendance_calendar_page(hours=10), _calendar),
+    "login_check/login_page": (fixtures.login_page, _login_check),
+    "login_check/profile_worst": (lambda: fixtures.profile_page(extra_fields=400), _login_check),
+}
+
+
+@contextlib.contextmanager
+def no_network():
+    def refuse(*args, **kwargs):
+        raise RuntimeError("benchmarks must not use the network")
+
+    original = socket.socket.connect
+    socket.socket.connect = refuse
+    try:
+        yield
+    finally:
+        socket.socket.connect = original
+
+
+def measure(markup, parser, repeat, min_time):
+    parser(markup)  # warm up imports and regex caches
+
+    times = []
+    started = time.perf_counter()
+    while len(times) < repeat or time.perf_counter() - started < min_time:
+        t0 = time.perf_counter()
+        parser(markup)
+        times.append(time.perf_counter() - t0)
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = parser(markup)
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained_blocks = sum(
+        stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0
+    )
+    del result
+
+    return {
+        "input_bytes": len(markup),
+        "runs": len(times),
+        "median_ms": round(statistics.median(times) * 1000, 3),
+        "min_ms": round(min(times) * 1000, 3),
+        "retained_blocks": retained_blocks,
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def run(selected, repeat, min_time):
+    results = {}
+    with no_network(), open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for name in selected:
+            build, parser = CASES[name]
+            results[name] = measure(build(), parser, repeat, min_time)
+    return results
+
+
+def print_table(results, baseline=None, threshold=1.25):
+    regressions = []
+    header = f"{'case':32} {'bytes':>8} {'median ms':>10} {'min ms':>9} {'blocks':>8} {'peak KiB':>9}"
+    if baseline:
+        header += f" {'vs base':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, row in results.items():
+        line = (
+            f"{name:32} {row['input_bytes']:>8} {row['median_ms']:>10.3f} {row['min_ms']:>9.3f} "
+            f"{row['retained_blocks']:>8} {row['peak_kib']:>9.1f}"
+        )
+        base = (baseline or {}).get(name)
+        if base:
+            ratio = row["median_ms"] / base["median_ms"] if base["median_ms"] else 1.0
+            line += f" {ratio:>7.2f}x"
+            if ratio > threshold:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="pattern", help="only run cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="minimum timed runs per case")
+    parser.add_argument("--min-time", type=float, default=0.5, help="minimum seconds spent timing each case")
+    parser.add_argument("--save", metavar="FILE", help="write the results as a new baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare against a saved baseline")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    selected = [name for name in CASES if not args.pattern or args.pattern in name]
+    results = run(selected, args.repeat, args.min_time)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["cases"]
+
+    print(f"parser backend: {parser_backend()}  python: {platform.python_version()}")
+    regressions = print_table(results, baseline, args.threshold)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "parser_backend": parser_backend(),
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "cases": results,
+                },
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+            f.write("\n")
+        print(f"saved baseline to {args.save}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""JSON serialization and response compression benchmarks.
+
+Builds the response bodies of the largest endpoints from the fixture
+pages and reports, per body, the CPU time of each JSON provider and the
+bytes sent with each content encoding, with the time to compress them.
+
+    python -m benchmarks.serialize
+    python -m benchmarks.serialize -k end_semester
+"""
+
+import argparse
+import contextlib
+import gzip
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+from app.routes.academic_analysis import parse_semester_data  # noqa: E402
+from app.routes.end_semester_results import parse_detailed_results  # noqa: E402
+from app.routes.profile import parse_profile  # noqa: E402
+from app.routes.results import parse_results  # noqa: E402
+from app.utils.compression import HAS_BROTLI  # noqa: E402
+from app.utils.html_parser import parse_html  # noqa: E402
+from app.utils.json_provider import HAS_ORJSON, OrjsonProvider, TimedJSONProvider  # noqa: E402
+from benchmarks import fixtures  # noqa: E402
+from config import Config  # noqa: E402
+
+if HAS_BROTLI:
+    import brotli
+
+
+def _end_semester_results(exams, subjects):
+    """Body of /api/end-semester-results with every detail page embedded."""
+    links = []
+    for exam in range(exams):
+        markup = fixtures.exam_detail_page(subjects, exam_id=1000 + exam)
+        url = f"{Config.BASE_URL}/universityexam/student/viewresult?id={1000 + exam}"
+        links.append(
+            {
+                "text": "View Result",
+                "href": url,
+                "results": parse_detailed_results(parse_html(markup, "exam_detail"), url),
+            }
+        )
+    return {
+        "end_semester_exams": [{"exam_title": f"Semester {exam + 1} Exam", "semester": str(exam + 1)} for exam in range(exams)],
+        "available_links": links,
+        "total_end_semester_exams": exams,
+        "debug_info": {"requested_semester": None, "semester_filter_applied": False, "url_used": Config.BASE_URL},
+    }
+
+
+# name -> body builder
+BODIES = {
+    "profile/realistic": lambda: parse_profile(parse_html(fixtures.profile_page(), "profile")),
+    "profile/worst": lambda: parse_profile(parse_html(fixtures.profile_page(extra_fields=400), "profile")),
+    "end_semester_results/realistic": lambda: _end_semester_results(6, 8),
+    "end_semester_results/worst": lambda: _end_semester_results(8, 60),
+    "results/worst": lambda: parse_results(parse_html(fixtures.results_page(200), "results"), None),
+    "academic_analysis/realistic": lambda: parse_semester_data(parse_html(fixtures.academic_analysis_page(8))),
+}
+
+
+def timeit(func, min_time):
+    func()
+    times = []
+    started = time.perf_counter()
+    while len(times) < 5 or time.perf_counter() - started < min_time:
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times) * 1e6
+
+
+def measure(app, body, min_time):
+    row = {}
+    providers = {"stdlib": TimedJSONProvider(app)}
+    if HAS_ORJSON:
+        providers["orjson"] = OrjsonProvider(app)
+    with app.app_context():
+        for name, provider in providers.items():
+            row[f"{name}_us"] = timeit(lambda: provider.response(body).get_data(), min_time)
+        data = providers["stdlib"].response(body).get_data()
+
+    row["identity_bytes"] = len(data)
+    encoders = {"gzip": lambda: gzip.compress(data, compresslevel=Config.COMPRESS_GZIP_LEVEL, mtime=0)}
+    if HAS_BROTLI:
+        encoders["br"] = lambda: brotli.compress(data, quality=Config.COMPRESS_BROTLI_QUALITY)
+    for name, encode in encoders.items():
+        row[f"{name}_bytes"] = len(encode())
+        row[f"{name}_us"] = timeit(encode, min_time)
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="pattern", help="only run bodies whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=0.3, help="minimum seconds spent timing each step")
+    args = parser.parse_args(argv)
+
+    app = Flask(__name__)
+    print(f"orjson: {HAS_ORJSON}  brotli: {HAS_BROTLI}  gzip level: {Config.COMPRESS_GZIP_LEVEL}  "
+          f"brotli quality: {Config.COMPRESS_BROTLI_QUALITY}")
+    header = (
+        f"{'body':32} {'stdlib us':>10} {'orjson us':>10} {'bytes':>8} "
+        f"{'gzip':>7} {'gzip us':>8} {'br':>7} {'br us':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for name, build in BODIES.items():
+        if args.pattern and args.pattern not in name:
+            continue
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            body = build()
+        row = measure(app, body, args.min_time)
+        print(
+            f"{name:32} {row['stdlib_us']:>10.1f} {row.get('orjson_us', float('nan')):>10.1f} "
+            f"{row['identity_bytes']:>8} {row['gzip_bytes']:>7} {row['gzip_us']:>8.1f} "
+            f"{row.get('br_bytes', 0):>7} {row.get('br_us', float('nan')):>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,160 @@
+import os
+import tempfile
+
+
+def _env_bool(name, default):
+    return os.environ.get(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
 class Config:
     USER_AGENT = "Mozilla/5.0 (Windows NT 6.1; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/39.0.2171.95 Safari/537.36"
-    BASE_URL = "https://sahrdaya.etlab.in"
+    # Point at a local stand-in (loadtest/etlab_stub.py) with ETLAB_BASE_URL
+    BASE_URL = os.environ.get("ETLAB_BASE_URL", "https://sahrdaya.etlab.in")
     COOKIE_KEY = "SAHRDAYASESSIONID"
+
+    # Connection pool of the shared upstream client, one per worker process
+    UPSTREAM_POOL_CONNECTIONS = int(os.environ.get("UPSTREAM_POOL_CONNECTIONS", 2))
+    UPSTREAM_POOL_MAXSIZE = int(os.environ.get("UPSTREAM_POOL_MAXSIZE", 16))
+    UPSTREAM_POOL_BLOCK = _env_bool("UPSTREAM_POOL_BLOCK", False)
+
+    # Detail pages of /api/end-semester-results are fetched in parallel
+    END_SEMESTER_DETAIL_WORKERS = int(os.environ.get("END_SEMESTER_DETAIL_WORKERS", 4))
+    END_SEMESTER_DETAIL_TIMEOUT = float(os.environ.get("END_SEMESTER_DETAIL_TIMEOUT", 15))
+
+    # In-process cache of scraped ETLab pages, TTLs in seconds by path prefix
+    UPSTREAM_CACHE_ENABLED = _env_bool("UPSTREAM_CACHE_ENABLED", True)
+    UPSTREAM_CACHE_MAX_BYTES = int(os.environ.get("UPSTREAM_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    UPSTREAM_CACHE_TTLS = {
+        "/student/profile": 3600,
+        "/student/timetable": 6 * 3600,
+        "/ktuacademics/student/studentacademicsautonomous": 3600,
+        "/universityexam/student/": 3600,
+        "/ktuacademics/student/results": 300,
+        "/ktuacademics/student/viewattendancesubject": 120,
+        "/ktuacademics/student/attendance": 120,
+    }
+    # Where cached pages live: "memory" (each worker its own), "sqlite" (one
+    # file shared by the workers of a host) or "redis" (shared by all nodes)
+    UPSTREAM_CACHE_BACKEND = os.environ.get("UPSTREAM_CACHE_BACKEND", "memory")
+    UPSTREAM_CACHE_SQLITE_PATH = os.environ.get(
+        "UPSTREAM_CACHE_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "etlab-api-cache.sqlite3")
+    )
+    UPSTREAM_CACHE_REDIS_URL = os.environ.get("UPSTREAM_CACHE_REDIS_URL", "redis://127.0.0.1:6379/0")
+    # Pages that can no longer change (attendance of past months, published
+    # exam results; see app/utils/cache_policy.py) are kept in a separate
+    # tier, by default a SQLite file that survives restarts. Entries are
+    # keyed by session token and useless once the session ends, so they are
+    # kept for about the lifetime of an ETLab session
+    UPSTREAM_IMMUTABLE_TTL = int(os.environ.get("UPSTREAM_IMMUTABLE_TTL", 24 * 3600))
+    UPSTREAM_IMMUTABLE_CACHE_BACKEND = os.environ.get("UPSTREAM_IMMUTABLE_CACHE_BACKEND", "sqlite")
+    UPSTREAM_IMMUTABLE_CACHE_PATH = os.environ.get(
+        "UPSTREAM_IMMUTABLE_CACHE_PATH", os.path.join(tempfile.gettempdir(), "etlab-api-immutable.sqlite3")
+    )
+    UPSTREAM_IMMUTABLE_CACHE_MAX_BYTES = int(os.environ.get("UPSTREAM_IMMUTABLE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+    # zlib level of stored pages (0 = uncompressed). Pages hold personal data;
+    # with a Fernet key (needs `cryptography`) they are encrypted as well
+    UPSTREAM_CACHE_COMPRESSION = int(os.environ.get("UPSTREAM_CACHE_COMPRESSION", 1))
+    UPSTREAM_CACHE_ENCRYPTION_KEY = os.environ.get("UPSTREAM_CACHE_ENCRYPTION_KEY") or None
+
+    # A token ETLab redirected to its login page is answered with 401 for
+    # TOKEN_EXPIRED_TTL seconds without asking ETLab again (0 = never). The
+    # marks are shared by the workers of a host (sqlite) or by every node
+    # (redis)
+    TOKEN_EXPIRED_TTL = int(os.environ.get("TOKEN_EXPIRED_TTL", 24 * 3600))
+    TOKEN_STATE_BACKEND = os.environ.get(
+        "TOKEN_STATE_BACKEND", "redis" if UPSTREAM_CACHE_BACKEND == "redis" else "sqlite"
+    )
+    TOKEN_STATE_SQLITE_PATH = os.environ.get(
+        "TOKEN_STATE_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "etlab-api-tokens.sqlite3")
+    )
+    TOKEN_STATE_MAX_BYTES = int(os.environ.get("TOKEN_STATE_MAX_BYTES", 4 * 1024 * 1024))
+
+    # Cache-Control max-age in seconds of API responses that carry an ETag
+    RESPONSE_MAX_AGES = {
+        "profile": int(os.environ.get("PROFILE_MAX_AGE", 300)),
+        "timetable": int(os.environ.get("TIMETABLE_MAX_AGE", 900)),
+        "academic_analysis": int(os.environ.get("ACADEMIC_ANALYSIS_MAX_AGE", 300)),
+        "end_semester_results": int(os.environ.get("END_SEMESTER_RESULTS_MAX_AGE", 900)),
+    }
+
+    # JSON encoder of API responses: "auto" (orjson when installed), "orjson" or "stdlib"
+    JSON_PROVIDER = os.environ.get("JSON_PROVIDER", "auto")
+    # JSON responses of at least COMPRESS_MIN_BYTES are sent with brotli (when
+    # installed) or gzip, whichever the client prefers
+    COMPRESS_ENABLED = _env_bool("COMPRESS_ENABLED", True)
+    COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", 1024))
+    COMPRESS_MIMETYPES = ("application/json",)
+    COMPRESS_GZIP_LEVEL = int(os.environ.get("COMPRESS_GZIP_LEVEL", 6))
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get("COMPRESS_BROTLI_QUALITY", 4))
+
+    # Parsed timetables are kept per token, as they only change between semesters
+    TIMETABLE_CACHE_TTL = int(os.environ.get("TIMETABLE_CACHE_TTL", 12 * 3600))
+    # Upper bound on that TTL when expired tokens are not shared by the
+    # workers (TOKEN_STATE_BACKEND "memory")
+    TIMETABLE_CACHE_LOCAL_TTL = int(os.environ.get("TIMETABLE_CACHE_LOCAL_TTL", 300))
+    TIMETABLE_CACHE_MAX_BYTES = int(os.environ.get("TIMETABLE_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+    # Clock times of the periods for /api/timetable/now, in the college's time zone
+    TIMETABLE_PERIODS = os.environ.get(
+        "TIMETABLE_PERIODS",
+        "09:00-09:50,09:50-10:40,10:50-11:40,11:40-12:30,13:30-14:20,14:20-15:10,15:10-16:00",
+    )
+    TIMEZONE = os.environ.get("TIMEZONE", "Asia/Kolkata")
+
+    # BeautifulSoup tree builder: "auto" (lxml when installed), "lxml" or "html.parser"
+    HTML_PARSER = os.environ.get("HTML_PARSER", "auto")
+    HTML_PARSER_STRAINERS = _env_bool("HTML_PARSER_STRAINERS", True)
+    # An expired session is detected from the <title> within the first
+    # LOGIN_SCAN_BYTES of a page, before it is parsed
+    LOGIN_SCAN_BYTES = int(os.environ.get("LOGIN_SCAN_BYTES", 16 * 1024))
+
+    # (connect, read) timeouts in seconds, overridable per path prefix
+    UPSTREAM_TIMEOUT = (
+        float(os.environ.get("UPSTREAM_CONNECT_TIMEOUT", 3.05)),
+        float(os.environ.get("UPSTREAM_READ_TIMEOUT", 15)),
+    )
+    UPSTREAM_TIMEOUTS = {
+        "/user/login": (3.05, 20),
+        "/user/logout": (3.05, 5),
+        "/student/timetable": (3.05, 10),
+        "/universityexam/student/examresult": (3.05, 20),
+    }
+
+    # GETs are retried with jittered exponential backoff; retries may not
+    # exceed UPSTREAM_RETRY_BUDGET_RATIO of the request volume
+    UPSTREAM_RETRIES = int(os.environ.get("UPSTREAM_RETRIES", 2))
+    UPSTREAM_RETRY_BACKOFF = float(os.environ.get("UPSTREAM_RETRY_BACKOFF", 0.2))
+    UPSTREAM_RETRY_BUDGET_RATIO = float(os.environ.get("UPSTREAM_RETRY_BUDGET_RATIO", 0.1))
+    UPSTREAM_RETRY_BUDGET_MAX = int(os.environ.get("UPSTREAM_RETRY_BUDGET_MAX", 10))
+
+    # Circuit breaker: open after N consecutive failures, probe again after RESET seconds
+    UPSTREAM_BREAKER_FAILURES = int(os.environ.get("UPSTREAM_BREAKER_FAILURES", 5))
+    UPSTREAM_BREAKER_RESET = float(os.environ.get("UPSTREAM_BREAKER_RESET", 30))
+    # A failed request is answered with 503 for this many seconds without retrying it
+    UPSTREAM_ERROR_CACHE_TTL = float(os.environ.get("UPSTREAM_ERROR_CACHE_TTL", 5))
+
+    # /api/attendance/range fetches its months in parallel
+    ATTENDANCE_RANGE_MAX_MONTHS = int(os.environ.get("ATTENDANCE_RANGE_MAX_MONTHS", 12))
+    ATTENDANCE_RANGE_WORKERS = int(os.environ.get("ATTENDANCE_RANGE_WORKERS", 4))
+    ATTENDANCE_RANGE_TIMEOUT = float(os.environ.get("ATTENDANCE_RANGE_TIMEOUT", 20))
+
+    # /api/dashboard loads its sections in parallel
+    DASHBOARD_WORKERS = int(os.environ.get("DASHBOARD_WORKERS", 4))
+    DASHBOARD_SECTION_TIMEOUT = float(os.environ.get("DASHBOARD_SECTION_TIMEOUT", 30))
+
+    # After a login, warm the profile, timetable and attendance pages into
+    # the cache in the background. Prefetching waits while more than
+    # PREFETCH_BUSY_REQUESTS requests are being served and gives up after
+    # PREFETCH_MAX_DELAY seconds
+    PREFETCH_ENABLED = _env_bool("PREFETCH_ENABLED", False)
+    PREFETCH_WORKERS = int(os.environ.get("PREFETCH_WORKERS", 2))
+    PREFETCH_QUEUE_SIZE = int(os.environ.get("PREFETCH_QUEUE_SIZE", 64))
+    PREFETCH_BUSY_REQUESTS = int(os.environ.get("PREFETCH_BUSY_REQUESTS", 4))
+    PREFETCH_MAX_DELAY = float(os.environ.get("PREFETCH_MAX_DELAY", 30))
+
+    # Request logs are JSON lines on stderr. Failed and slow requests are
+    # always logged, the rest only for a LOG_SAMPLE_RATE share of requests
+    LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+    LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", 0.01))
+    LOG_SLOW_REQUEST_MS = float(os.environ.get("LOG_SLOW_REQUEST_MS", 2000))
+    # Phase timings (upstream, parse, serialize) in a Server-Timing response header
+    SERVER_TIMING = _env_bool("SERVER_TIMING", True)
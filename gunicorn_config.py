@@ -1 +1,69 @@
-workers = 4
+"""Gunicorn settings, each overridable from the environment.
+
+The API spends almost all of its time waiting on ETLab, so the default is
+threaded workers: a sync worker serves one request at a time and four of
+them were saturated by four concurrent users. See loadtest/RESULTS.md for
+the measurements behind these defaults.
+"""
+
+import gc
+import os
+import shutil
+import tempfile
+
+
+def _env_bool(name, default):
+    return os.environ.get(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.environ.get("GUNICORN_WORKERS", os.environ.get("WEB_CONCURRENCY", 4)))
+# Threads per worker (gthread only)
+threads = int(os.environ.get("GUNICORN_THREADS", 16))
+# Concurrent greenlets per worker (gevent only)
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 256))
+
+if "GUNICORN_BIND" in os.environ:
+    bind = os.environ["GUNICORN_BIND"]
+
+# Must exceed the longest upstream call including retries (see Config.UPSTREAM_*)
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+# Recycle workers now and then so slow leaks in scraped-page handling stay bounded
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 200))
+
+# Load the app once in the master and fork it, sharing the imported code
+preload_app = _env_bool("GUNICORN_PRELOAD", True)
+
+# Workers write their metrics here and /api/metrics merges them (see
+# app/utils/metrics.py). prometheus_client reads the variable on import, so
+# it is set before the app loads, and the files of a previous run are wiped.
+metrics_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "etlab-api-metrics")
+)
+shutil.rmtree(metrics_dir, ignore_errors=True)
+os.makedirs(metrics_dir, exist_ok=True)
+
+if worker_class == "gevent" and preload_app:
+    # The app is imported before the workers start, so sockets and ssl
+    # must be patched before that import rather than by the worker.
+    from gevent import monkey
+
+    monkey.patch_all()
+
+
+def pre_fork(server, worker):
+    # Move everything the master allocated into the permanent generation so
+    # the collector in the children never touches (and un-shares) those pages.
+    if preload_app:
+        gc.freeze()
+
+
+def child_exit(server, worker):
+    # Drop the live gauges (in-flight requests, pool size) of a dead worker
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
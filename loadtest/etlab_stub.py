@@ -0,0 +1,191 @@
+"""Local stand-in for sahrdaya.etlab.in.
+
+Serves the anonymized fixture pages of benchmarks/fixtures.py on the
+paths the API scrapes, with configurable latency, jitter, error rates and
+session expiry, so the API can be load tested without the real portal:
+
+    python -m loadtest.etlab_stub --port 8001 --latency-ms 300 --jitter-ms 200
+    ETLAB_BASE_URL=http://127.0.0.1:8001 gunicorn -c gunicorn_config.py run:app
+"""
+
+import argparse
+import functools
+import logging
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+
+from flask import Flask, make_response, redirect, request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import fixtures  # noqa: E402
+from config import Config  # noqa: E402
+
+
+class StubSettings:
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, hang_rate=0.0,
+                 hang_seconds=30, session_ttl=0, strict_sessions=False, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.session_ttl = session_ttl
+        self.strict_sessions = strict_sessions
+        self.random = random.Random(seed)
+
+
+@functools.lru_cache(maxsize=None)
+def _page(name, *args):
+    return getattr(fixtures, name)(*args)
+
+
+def create_stub(settings=None):
+    settings = settings or StubSettings()
+    app = Flask(__name__)
+    sessions = {}
+    sessions_lock = threading.Lock()
+    stats = {"requests": 0, "errors": 0, "hangs": 0, "expired": 0}
+
+    def session_valid(token):
+        if not token:
+            return False
+        with sessions_lock:
+            created = sessions.get(token)
+        if created is None:
+            return not settings.strict_sessions
+        if settings.session_ttl and time.monotonic() - created > settings.session_ttl:
+            with sessions_lock:
+                sessions.pop(token, None)
+            return False
+        return True
+
+    @app.before_request
+    def simulate_upstream():
+        stats["requests"] += 1
+        delay = settings.latency_ms
+        if settings.jitter_ms:
+            delay += settings.random.uniform(0, settings.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000)
+
+        roll = settings.random.random()
+        if roll < settings.hang_rate:
+            stats["hangs"] += 1
+            time.sleep(settings.hang_seconds)
+        elif roll < settings.hang_rate + settings.error_rate:
+            stats["errors"] += 1
+            return make_response("<html><head><title>Error</title></head><body>Internal error</body></html>", 500)
+
+        if request.path.startswith("/user/") or request.path == "/_stub/stats":
+            return None
+        if not session_valid(request.cookies.get(Config.COOKIE_KEY)):
+            stats["expired"] += 1
+            return redirect("/user/login")
+        return None
+
+    @app.route("/user/login", methods=["GET", "POST"])
+    def login():
+        if request.method == "GET" or request.form.get("LoginForm[password]") in (None, "", "wrong"):
+            return _page("login_page")
+        token = secrets.token_hex(16)
+        with sessions_lock:
+            sessions[token] = time.monotonic()
+        response = redirect("/student/profile")
+        response.set_cookie(Config.COOKIE_KEY, token, path="/")
+        return response
+
+    @app.route("/user/logout")
+    def logout():
+        with sessions_lock:
+            sessions.pop(request.cookies.get(Config.COOKIE_KEY), None)
+        return redirect("/user/login")
+
+    @app.route("/student/profile")
+    def profile():
+        return _page("profile_page")
+
+    @app.route("/student/timetable")
+    def timetable():
+        if request.args.get("format") == "csv":
+            response = make_response(_page("timetable_csv"))
+            response.headers["Content-Type"] = "text/csv"
+            return response
+        return _page("page", "ETLab | Timetable", "")
+
+    @app.route("/ktuacademics/student/results")
+    def results():
+        return _page("results_page")
+
+    @app.route("/ktuacademics/student/viewattendancesubject/<int:semester>")
+    def attendance_subject(semester):
+        return _page("attendance_subject_page", 7, semester)
+
+    @app.route("/ktuacademics/student/attendance", methods=["GET", "POST"])
+    def attendance_calendar():
+        month = int(request.form.get("month", 3))
+        year = int(request.form.get("year", 2024))
+        semester = int(request.form.get("semester", 14)) - 8
+        return _page("attendance_calendar_page", month, year, semester, 31, 6, month * year)
+
+    @app.route("/ktuacademics/student/studentacademicsautonomous")
+    def academic_analysis():
+        return _page("academic_analysis_page", 6)
+
+    @app.route("/universityexam/student/examresult")
+    def exam_list():
+        return _page("exam_list_page", 6)
+
+    @app.route("/universityexam/student/viewresult")
+    def exam_detail():
+        return _page("exam_detail_page", 8, int(request.args.get("id", 1000)))
+
+    @app.route("/_stub/stats")
+    def stub_stats():
+        with sessions_lock:
+            return {**stats, "sessions": len(sessions)}
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=float(os.environ.get("STUB_LATENCY_MS", 0)))
+    parser.add_argument("--jitter-ms", type=float, default=float(os.environ.get("STUB_JITTER_MS", 0)))
+    parser.add_argument("--error-rate", type=float, default=float(os.environ.get("STUB_ERROR_RATE", 0)),
+                        help="fraction of requests answered with a 500")
+    parser.add_argument("--hang-rate", type=float, default=float(os.environ.get("STUB_HANG_RATE", 0)),
+                        help="fraction of requests that stall for --hang-seconds")
+    parser.add_argument("--hang-seconds", type=float, default=30)
+    parser.add_argument("--session-ttl", type=float, default=float(os.environ.get("STUB_SESSION_TTL", 0)),
+                        help="seconds before a login session expires (0 = never)")
+    parser.add_argument("--strict-sessions", action="store_true",
+                        help="only accept tokens issued by /user/login")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--quiet", action="store_true", help="do not log every request")
+    args = parser.parse_args(argv)
+
+    if args.quiet:
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    settings = StubSettings(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        hang_rate=args.hang_rate,
+        hang_seconds=args.hang_seconds,
+        session_ttl=args.session_ttl,
+        strict_sessions=args.strict_sessions,
+        seed=args.seed,
+    )
+    create_stub(settings).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Closed-loop load generator for the API.
+
+Each of --concurrency clients logs in once and then requests the given
+endpoints in a loop for --duration seconds. Prints throughput and latency
+percentiles per endpoint:
+
+    python -m loadtest.load --url http://127.0.0.1:8000 --concurrency 32 --duration 30 \\
+        /api/profile /api/results /api/timetable
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def client(url, endpoints, deadline, username, password, samples, errors, lock, extra_headers):
+    session = requests.Session()
+    token = username
+    if password:
+        response = session.post(f"{url}/api/login", json={"username": username, "password": password})
+        token = response.json().get("token", username)
+    headers = {"Authorization": f"Bearer {token}", **extra_headers}
+
+    index = 0
+    while time.monotonic() < deadline:
+        endpoint = endpoints[index % len(endpoints)]
+        index += 1
+        started = time.perf_counter()
+        try:
+            response = session.get(f"{url}{endpoint}", headers=headers, timeout=60)
+            status = response.status_code
+        except requests.exceptions.RequestException as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - started
+        with lock:
+            samples[endpoint].append(elapsed)
+            if status != 200:
+                errors[endpoint][str(status)] += 1
+
+
+def run(url, endpoints, concurrency, duration, password=None, extra_headers=None):
+    samples = defaultdict(list)
+    errors = defaultdict(lambda: defaultdict(int))
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    threads = [
+        threading.Thread(
+            target=client,
+            args=(url, endpoints, deadline, f"loadtest{i}", password, samples, errors, lock, extra_headers or {}),
+            daemon=True,
+        )
+        for i in range(concurrency)
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.monotonic() - started
+
+    report = {"concurrency": concurrency, "duration_s": round(wall, 2), "endpoints": {}}
+    all_samples = []
+    for endpoint in endpoints:
+        values = samples[endpoint]
+        all_samples += values
+        report["endpoints"][endpoint] = summarize(values, wall, errors[endpoint])
+    report["total"] = summarize(all_samples, wall, {
+        status: sum(errors[e].get(status, 0) for e in endpoints)
+        for status in {s for e in endpoints for s in errors[e]}
+    })
+    return report
+
+
+def summarize(values, wall, errors):
+    return {
+        "requests": len(values),
+        "rps": round(len(values) / wall, 1) if wall else 0.0,
+        "mean_ms": round(statistics.mean(values) * 1000, 1) if values else 0.0,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 1),
+        "p90_ms": round(percentile(values, 0.90) * 1000, 1),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 1),
+        "max_ms": round(max(values) * 1000, 1) if values else 0.0,
+        "errors": dict(errors),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("endpoints", nargs="+")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--password", help="log in through /api/login instead of using made-up tokens")
+    parser.add_argument("--no-cache", action="store_true", help="send Cache-Control: no-cache")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    extra_headers = {"Cache-Control": "no-cache"} if args.no_cache else {}
+    report = run(args.url, args.endpoints, args.concurrency, args.duration, args.password, extra_headers)
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+
+    print(f"concurrency {report['concurrency']}, {report['duration_s']}s")
+    print(f"{'endpoint':36} {'reqs':>7} {'rps':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}  errors")
+    for name, row in list(report["endpoints"].items()) + [("total", report["total"])]:
+        print(
+            f"{name:36} {row['requests']:>7} {row['rps']:>8.1f} {row['p50_ms']:>8.1f} "
+            f"{row['p90_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}  {row['errors'] or ''}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Local stand-in for a Redis server.
+
+Speaks enough of the Redis protocol (RESP2) for the redis cache backend:
+GET, SET with EX/PX, DEL/UNLINK, SCAN, DBSIZE, FLUSHDB and PING. Keys
+expire like on a real server. An optional latency simulates a cache on
+another node:
+
+    python -m loadtest.redis_stub --port 6380 --latency-ms 1
+    UPSTREAM_CACHE_BACKEND=redis UPSTREAM_CACHE_REDIS_URL=redis://127.0.0.1:6380/0 \\
+        gunicorn -c gunicorn_config.py run:app
+"""
+
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+class RespError(Exception):
+    pass
+
+
+class Store:
+    def __init__(self):
+        self._data = {}  # key -> (value, expires_at or None)
+        self._lock = threading.Lock()
+        self.commands = 0
+
+    def _live(self, key, now):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def execute(self, name, args):
+        now = time.monotonic()
+        with self._lock:
+            self.commands += 1
+            if name == b"PING":
+                return args[0] if args else "PONG"
+            if name == b"GET":
+                entry = self._live(args[0], now)
+                return entry[0] if entry else None
+            if name == b"SET":
+                key, value, options = args[0], args[1], [arg.upper() for arg in args[2:]]
+                expires_at = None
+                if b"EX" in options:
+                    expires_at = now + int(args[2 + options.index(b"EX") + 1])
+                elif b"PX" in options:
+                    expires_at = now + int(args[2 + options.index(b"PX") + 1]) / 1000
+                self._data[key] = (value, expires_at)
+                return "OK"
+            if name in (b"DEL", b"UNLINK"):
+                return sum(self._data.pop(key, None) is not None for key in args)
+            if name == b"SCAN":
+                # The whole keyspace in one page, so the cursor is always 0
+                options = [arg.upper() for arg in args[1:]]
+                pattern = args[1 + options.index(b"MATCH") + 1] if b"MATCH" in options else b"*"
+                keys = [key for key in list(self._data) if self._live(key, now)]
+                return [b"0", [key for key in keys if fnmatch.fnmatchcase(key, pattern)]]
+            if name == b"DBSIZE":
+                return sum(1 for key in list(self._data) if self._live(key, now))
+            if name == b"FLUSHDB":
+                self._data.clear()
+                return "OK"
+            if name in (b"SELECT", b"CLIENT"):
+                return "OK"
+        raise RespError(f"ERR unknown command '{name.decode(errors='replace')}'")
+
+
+def _read_command(rfile):
+    line = rfile.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        # Inline command, e.g. from telnet
+        return line.split()
+    args = []
+    for _ in range(int(line[1:])):
+        length = int(rfile.readline()[1:])
+        args.append(rfile.read(length + 2)[:-2])
+    return args
+
+
+def _encode(value):
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RespError):
+        return b"-" + str(value).encode() + b"\r\n"
+    if isinstance(value, str):
+        return b"+" + value.encode() + b"\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    return b"*%d\r\n" % len(value) + b"".join(_encode(item) for item in value)
+
+
+def create_server(host="127.0.0.1", port=6380, latency_ms=0):
+    store = Store()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            while True:
+                command = _read_command(self.rfile)
+                if not command:
+                    return
+                if latency_ms:
+                    time.sleep(latency_ms / 1000)
+                try:
+                    reply = store.execute(command[0].upper(), command[1:])
+                except RespError as e:
+                    reply = e
+                except (IndexError, ValueError):
+                    reply = RespError("ERR syntax error")
+                self.wfile.write(_encode(reply))
+
+    server = socketserver.ThreadingTCPServer((host, port), Handler, bind_and_activate=False)
+    server.daemon_threads = True
+    server.allow_reuse_address = True
+    server.server_bind()
+    server.server_activate()
+    server.store = store
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    parser.add_argument("--latency-ms", type=float, default=0, help="delay before every reply")
+    args = parser.parse_args(argv)
+    create_server(args.host, args.port, args.latency_ms).serve_forever()
+
+
+if __name__ == "__main__":
+    main()